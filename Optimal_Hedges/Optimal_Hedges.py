@@ -1,30 +1,35 @@
+import os
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 import seaborn as sns
 import streamlit as st
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib import cm
 from black_scholes import BlackScholes
+from delta_hedging import backtest, policy_label, summary, sweep
+from figure_cache import cache_figure, cache_grid, show_figure
+from hedge_solver import GREEKS, METHODS, exposure_matrix, hedge_universe, solve_hedge
+from scenario_cube import greek_cubes
+from strategies import Leg, Strategy
 
-def generate_heatmap_data(bs_model, greek_method, spot_min, spot_max, T_min, T_max, option_type, num_contracts):
-    spot_range = np.linspace(spot_min, spot_max, 10)
-    T_range = np.linspace(T_min, T_max, 10)  # Replace vol_range with T_range
-    heatmap_data = np.zeros((len(T_range), len(spot_range)))
-
-    for i, T in enumerate(T_range):
-        for j, spot in enumerate(spot_range):
-            bs_model.S = spot
-            bs_model.T = T  # Explicitly vary time to maturity
-            if greek_method in ['gamma', 'vega']:
-                greek_value = getattr(bs_model, greek_method)() * num_contracts
-            else:
-                greek_value = getattr(bs_model, greek_method)(option_type) * num_contracts
-            heatmap_data[i, j] = greek_value
+# Every Greek of num_contracts options over a spot x vol x T lattice from one all_greeks call,
+# as read-only scenario cubes keyed by Greek name (see scenario_cube.greek_cubes). With
+# num_vol=1 the vol axis is just vol_min.
+@cache_grid
+def greek_surfaces(K, r, option_type, num_contracts, spot_min, spot_max, T_min, T_max, vol_min, vol_max, num_spot=10, num_T=10, num_vol=1, precision="float64"):
+    position = Strategy(f"{num_contracts} {option_type.capitalize()}", [Leg(option_type, K, num_contracts)])
+    return greek_cubes(position, np.linspace(spot_min, spot_max, num_spot), np.linspace(vol_min, vol_max, num_vol),
+                       np.linspace(T_min, T_max, num_T), r, precision)
 
+# One Greek over spot x T at a single vol: a view into the cached cubes, rows along T
+def greek_grid(K, r, sigma, greek_method, spot_min, spot_max, T_min, T_max, option_type, num_contracts, precision="float64"):
+    cube = greek_surfaces(K, r, option_type, num_contracts, spot_min, spot_max, T_min, T_max, sigma, sigma, precision=precision)[greek_method.capitalize()]
+    heatmap_data, T_range, spot_range = cube.view("T", "spot")
     return heatmap_data, spot_range, T_range
 
 
-def plot_surface(heatmap_data, spot_range, vol_range, greek_name, option_type):
+def surface_figure(heatmap_data, spot_range, vol_range, greek_name, option_type):
     fig = plt.figure(figsize=(10, 6))  
     ax = fig.add_subplot(111, projection='3d')  # Add 3D subplot
 
@@ -50,8 +55,122 @@ def plot_surface(heatmap_data, spot_range, vol_range, greek_name, option_type):
     # Set the view angle for better visualization
     ax.view_init(elev=25, azim=300)  # Fine-tuned elevation and azimuth for a closer match
 
-    # Render the plot in Streamlit
-    st.pyplot(fig)
+    return fig
+
+@cache_figure
+def greek_surface(K, r, sigma, greek_method, spot_min, spot_max, T_min, T_max, option_type, num_contracts, precision="float64"):
+    heatmap_data, spot_range, T_range = greek_grid(K, r, sigma, greek_method, spot_min, spot_max, T_min, T_max, option_type, num_contracts, precision)
+    return surface_figure(heatmap_data, spot_range, T_range, greek_method, option_type)
+
+# Hedging P&L histogram and summary statistics of a dynamically delta-hedged option
+@cache_figure
+def hedge_backtest(S, K, T, r, sigma, option_type, side, num_paths, rebalance_every, realized_vol, cost_rate):
+    result = backtest(S, K, T, r, sigma, option_type, side, num_paths, rebalance_every=rebalance_every,
+                      realized_vol=realized_vol, cost_rate=cost_rate)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.hist(result.pnl, bins=100, color="steelblue", alpha=0.8)
+    ax.axvline(0, color="black", linewidth=1)
+    ax.set_title(f"Hedging P&L: {side.capitalize()} {option_type.capitalize()}, Rebalanced Every {rebalance_every} Day(s)")
+    ax.set_xlabel("P&L at Expiry (per option)")
+    ax.set_ylabel("Paths")
+    return fig, summary(result)
+
+def show_hedge_backtest(S, K, T, r, sigma):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        option_type = st.selectbox("Option", ["call", "put"], key="backtest_option_type")
+        side = st.selectbox("Side", ["short", "long"], key="backtest_side")
+    with col2:
+        num_paths = st.select_slider("Paths", [1_000, 10_000, 50_000, 100_000], value=10_000, key="backtest_num_paths")
+        rebalance_every = st.slider("Rebalance every (trading days)", min_value=1, max_value=21, value=1, key="backtest_rebalance_every")
+    with col3:
+        realized_vol = st.number_input("Realized volatility", value=float(sigma), min_value=0.01, step=0.01, key="backtest_realized_vol")
+        cost_rate = st.number_input("Transaction cost (% of notional)", value=0.0, min_value=0.0, step=0.01, key="backtest_cost_rate") / 100
+
+    png, statistics = hedge_backtest(S, K, T, r, sigma, option_type, side, num_paths, rebalance_every, realized_vol, cost_rate)
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        show_figure(png)
+    with col2:
+        st.dataframe(pd.Series(statistics, name="Value").round(4))
+
+# Cost against hedging error of the default rebalancing policies over common random numbers,
+# with the efficient policies joined up as the frontier
+@cache_figure
+def hedge_policy_sweep(S, K, T, r, sigma, option_type, side, num_paths, realized_vol, cost_rate, workers):
+    points = sweep(S, K, T, r, sigma, option_type=option_type, side=side, num_paths=num_paths, realized_vol=realized_vol,
+                   cost_rate=cost_rate, workers=workers)
+    table = pd.DataFrame({"Mean Cost": [point.mean_cost for point in points], "Hedging Error (Std)": [point.std_pnl for point in points],
+                          "Mean P&L": [point.mean_pnl for point in points], "Mean Trades": [point.mean_trades for point in points],
+                          "Efficient": [point.efficient for point in points]},
+                         index=[policy_label(point.policy) for point in points])
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for kind, marker in (("interval", "o"), ("delta_band", "s"), ("gamma_band", "^")):
+        rows = [point.policy.kind == kind for point in points]
+        ax.scatter(table["Mean Cost"][rows], table["Hedging Error (Std)"][rows], marker=marker, s=50,
+                   label={"interval": "Fixed interval", "delta_band": "Delta band", "gamma_band": "Gamma-scaled band"}[kind])
+    frontier = table[table["Efficient"]].sort_values("Mean Cost")
+    ax.plot(frontier["Mean Cost"], frontier["Hedging Error (Std)"], color="black", linewidth=1, label="Efficient frontier")
+    for label, row in table.iterrows():
+        ax.annotate(label, (row["Mean Cost"], row["Hedging Error (Std)"]), fontsize=7, xytext=(4, 4), textcoords="offset points")
+    ax.set_title("Rebalancing Policies: Transaction Cost vs Hedging Error")
+    ax.set_xlabel("Mean Transaction Cost (per option)")
+    ax.set_ylabel("Std of Hedging P&L (per option)")
+    ax.legend()
+    return fig, table
+
+def show_policy_sweep(S, K, T, r, sigma):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        option_type = st.selectbox("Option", ["call", "put"], key="sweep_option_type")
+        side = st.selectbox("Side", ["short", "long"], key="sweep_side")
+    with col2:
+        num_paths = st.select_slider("Paths", [1_000, 10_000, 50_000, 100_000], value=10_000, key="sweep_num_paths")
+        workers = st.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=1, step=1, key="sweep_workers")
+    with col3:
+        realized_vol = st.number_input("Realized volatility", value=float(sigma), min_value=0.01, step=0.01, key="sweep_realized_vol")
+        cost_rate = st.number_input("Transaction cost (% of notional)", value=0.1, min_value=0.0, step=0.01, key="sweep_cost_rate") / 100
+
+    if st.button("Run sweep", key="sweep_run"):
+        png, table = hedge_policy_sweep(S, K, T, r, sigma, option_type, side, num_paths, realized_vol, cost_rate, workers)
+        show_figure(png)
+        st.dataframe(table.round(4))
+
+def show_hedge_solver(S, K, T, r, sigma, total):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        greeks = st.multiselect("Greeks to neutralize", GREEKS, default=["Delta", "Gamma", "Vega"], key="hedge_greeks")
+        method = st.selectbox("Solver", METHODS, format_func=lambda name: {"least_squares": "Least squares", "min_cost": "Minimum transaction cost"}[name], key="hedge_method")
+    with col2:
+        num_strikes = st.slider("Strikes (K ± 30%)", min_value=3, max_value=101, value=21, step=2, key="hedge_num_strikes")
+        expiry_multiples = st.multiselect("Expiries (multiples of T)", [0.25, 0.5, 1.0, 2.0, 4.0], default=[0.5, 1.0, 2.0], key="hedge_expiries")
+    with col3:
+        cost_rate = st.number_input("Transaction cost (% of price)", value=1.0, min_value=0.0, step=0.1, key="hedge_cost_rate") / 100
+        penalty = st.number_input("Cost penalty (least squares)", value=0.0, min_value=0.0, format="%.4f", key="hedge_penalty")
+    if not greeks or not expiry_multiples:
+        st.info("Select at least one Greek and one expiry.")
+        return
+
+    universe = hedge_universe(S, np.linspace(0.7 * K, 1.3 * K, num_strikes), T * np.array(expiry_multiples), r, sigma, cost_rate, tick=0.01)
+    exposure = exposure_matrix(universe, S, r, sigma, greeks)
+    try:
+        hedge = solve_hedge([total[greek] for greek in greeks], exposure, universe.costs, method, penalty)
+    except ValueError as error:
+        st.warning(str(error))
+        return
+
+    trades = np.flatnonzero(np.abs(hedge.quantities) > 1e-8)
+    table = pd.DataFrame({"Quantity": hedge.quantities[trades], "Cost": np.abs(hedge.quantities[trades]) * universe.costs[trades]},
+                         index=[universe.labels[index] for index in trades])
+    st.caption(f"{len(universe.labels)} candidate instruments, {trades.size} traded, transaction cost {hedge.cost:.4f}")
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        st.dataframe(table.round(4))
+    with col2:
+        st.subheader("Hedged Greeks")
+        for greek, value in zip(greeks, hedge.residual):
+            st.markdown(f"**{greek}:** {value:.6f}")
 
 def show_page():
     # Retrieve input parameters from the sidebar
@@ -74,74 +193,53 @@ def show_page():
     with col2:
         num_contracts_put = st.number_input("Number of Put Contracts", value=1, min_value=1, step=1)
 
-    # Aggregate calculations for calls
-    delta_call = bs_model_call.delta("call") * num_contracts_call
-    gamma_call = bs_model_call.gamma() * num_contracts_call
-    vega_call = bs_model_call.vega() * num_contracts_call
-    rho_call = bs_model_call.rho("call") * num_contracts_call
-    theta_call = bs_model_call.theta("call") * num_contracts_call
+    # Call and put share every input but the purchase price, so one fused kernel call covers both
+    greeks = bs_model_call.greeks()
+    greeks_call = greeks.as_dict("call")
+    greeks_put = greeks.as_dict("put")
 
-    # Aggregate calculations for puts
-    delta_put = bs_model_put.delta("put") * num_contracts_put
-    gamma_put = bs_model_put.gamma() * num_contracts_put
-    vega_put = bs_model_put.vega() * num_contracts_put
-    rho_put = bs_model_put.rho("put") * num_contracts_put
-    theta_put = bs_model_put.theta("put") * num_contracts_put
+    # Aggregate calculations for calls and puts
+    aggregate_call = {greek: value * num_contracts_call for greek, value in greeks_call.items()}
+    aggregate_put = {greek: value * num_contracts_put for greek, value in greeks_put.items()}
 
     # Combined aggregate Greeks
-    total_delta = delta_call + delta_put
-    total_gamma = gamma_call + gamma_put
-    total_vega = vega_call + vega_put
-    total_rho = rho_call + rho_put
-    total_theta = theta_call + theta_put
+    total = {greek: aggregate_call[greek] + aggregate_put[greek] for greek in aggregate_call}
 
     # Calculate the opposing positions required to hedge each Greek
-    hedge_delta_underlying = -total_delta / bs_model_call.delta("call") if bs_model_call.delta("call") != 0 else float('inf')
-    hedge_delta_option = -total_delta / bs_model_put.delta("put") if bs_model_put.delta("put") != 0 else float('inf')
-    
-    hedge_gamma_underlying = -total_gamma / bs_model_call.gamma() if bs_model_call.gamma() != 0 else float('inf')
-    hedge_gamma_option = -total_gamma / bs_model_put.gamma() if bs_model_put.gamma() != 0 else float('inf')
-    
-    hedge_vega_underlying = -total_vega / bs_model_call.vega() if bs_model_call.vega() != 0 else float('inf')
-    hedge_vega_option = -total_vega / bs_model_put.vega() if bs_model_put.vega() != 0 else float('inf')
-    
-    hedge_rho_underlying = -total_rho / bs_model_call.rho("call") if bs_model_call.rho("call") != 0 else float('inf')
-    hedge_rho_option = -total_rho / bs_model_put.rho("put") if bs_model_put.rho("put") != 0 else float('inf')
-    
-    hedge_theta_underlying = -total_theta / bs_model_call.theta("call") if bs_model_call.theta("call") != 0 else float('inf')
-    hedge_theta_option = -total_theta / bs_model_put.theta("put") if bs_model_put.theta("put") != 0 else float('inf')
+    hedge_underlying = {greek: -total[greek] / greeks_call[greek] if greeks_call[greek] != 0 else float('inf') for greek in total}
+    hedge_option = {greek: -total[greek] / greeks_put[greek] if greeks_put[greek] != 0 else float('inf') for greek in total}
 
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Aggregate Greeks: Call")
-        st.markdown(f"**Delta:** {delta_call:.4f}")
-        st.markdown(f"**Gamma:** {gamma_call:.4f}")
-        st.markdown(f"**Vega:** {vega_call:.4f}")
-        st.markdown(f"**Rho:** {rho_call:.4f}")
-        st.markdown(f"**Theta:** {theta_call:.4f}")
+        for greek, value in aggregate_call.items():
+            st.markdown(f"**{greek}:** {value:.4f}")
 
         st.subheader("Call Optimal Hedge")
-        st.markdown(f"**Delta Hedge:** {hedge_delta_underlying:.4f} units of the underlying asset or {hedge_delta_option:.4f} put options")
-        st.markdown(f"**Gamma Hedge:** {hedge_gamma_underlying:.4f} units of the underlying asset or {hedge_gamma_option:.4f} put options")
-        st.markdown(f"**Vega Hedge:** {hedge_vega_underlying:.4f} units of the underlying asset or {hedge_vega_option:.4f} put options")
-        st.markdown(f"**Rho Hedge:** {hedge_rho_underlying:.4f} units of the underlying asset or {hedge_rho_option:.4f} put options")
-        st.markdown(f"**Theta Hedge:** {hedge_theta_underlying:.4f} units of the underlying asset or {hedge_theta_option:.4f} put options")
+        for greek in total:
+            st.markdown(f"**{greek} Hedge:** {hedge_underlying[greek]:.4f} units of the underlying asset or {hedge_option[greek]:.4f} put options")
         
     with col2:
         st.subheader("Aggregate Greeks: Put")
-        st.markdown(f"**Delta:** {delta_put:.4f}")
-        st.markdown(f"**Gamma:** {gamma_put:.4f}")
-        st.markdown(f"**Vega:** {vega_put:.4f}")
-        st.markdown(f"**Rho:** {rho_put:.4f}")
-        st.markdown(f"**Theta:** {theta_put:.4f}")
+        for greek, value in aggregate_put.items():
+            st.markdown(f"**{greek}:** {value:.4f}")
     
         st.subheader("Put Optimal Hedge")
-        st.markdown(f"**Delta Hedge:** {hedge_delta_underlying:.4f} units of the underlying asset or {hedge_delta_option:.4f} call options")
-        st.markdown(f"**Gamma Hedge:** {hedge_gamma_underlying:.4f} units of the underlying asset or {hedge_gamma_option:.4f} call options")
-        st.markdown(f"**Vega Hedge:** {hedge_vega_underlying:.4f} units of the underlying asset or {hedge_vega_option:.4f} call options")
-        st.markdown(f"**Rho Hedge:** {hedge_rho_underlying:.4f} units of the underlying asset or {hedge_rho_option:.4f} call options")
-        st.markdown(f"**Theta Hedge:** {hedge_theta_underlying:.4f} units of the underlying asset or {hedge_theta_option:.4f} call options")
+        for greek in total:
+            st.markdown(f"**{greek} Hedge:** {hedge_underlying[greek]:.4f} units of the underlying asset or {hedge_option[greek]:.4f} call options")
+
+    st.header("Multi-Greek Hedge")
+    st.markdown("""Neutralize several Greeks of the combined call and put position at once, trading the underlying and calls and puts across strikes and expiries.""")
+    show_hedge_solver(S, K, T, r, sigma, total)
+
+    st.header("Delta-Hedging Backtest")
+    st.markdown("""Simulate the option's underlying at the realized volatility and delta-hedge the option at the pricing volatility, with daily steps to expiry. The P&L is attributed to gamma (realized against implied variance), delta slippage between trades and transaction costs.""")
+    show_hedge_backtest(S, K, T, r, sigma)
+
+    st.header("Hedge Policy Sweep")
+    st.markdown("""Compare fixed-interval rebalancing with delta bands and gamma-scaled bands on the same simulated paths, and read off the policies on the cost against hedging error frontier.""")
+    show_policy_sweep(S, K, T, r, sigma)
 
     # Heatmaps for Greeks
     st.header("Heatmaps for Greeks")
@@ -150,6 +248,7 @@ def show_page():
     spot_max = st.session_state.hp_spot_max
     vol_min = st.session_state.hp_vol_min
     vol_max = st.session_state.hp_vol_max
+    precision = st.session_state.hp_precision
 
     greek_method = st.selectbox("Select Greek to Display", ["Delta", "Gamma", "Vega", "Rho", "Theta"])
     greek_name = greek_method.capitalize()
@@ -158,14 +257,8 @@ def show_page():
 
     with col1:
         st.subheader(f"Surface Plot for {greek_name} (Call Options)")
-        heatmap_data, spot_range, vol_range = generate_heatmap_data(
-            bs_model_call, greek_method.lower(), spot_min, spot_max, vol_min, vol_max, "call", num_contracts_call
-        )
-        plot_surface(heatmap_data, spot_range, vol_range, greek_name, "call")
+        show_figure(greek_surface(K, r, sigma, greek_method.lower(), spot_min, spot_max, vol_min, vol_max, "call", num_contracts_call, precision))
 
     with col2:
         st.subheader(f"Surface Plot for {greek_name} (Put Options)")
-        heatmap_data, spot_range, vol_range = generate_heatmap_data(
-            bs_model_put, greek_method.lower(), spot_min, spot_max, vol_min, vol_max, "put", num_contracts_put
-        )
-        plot_surface(heatmap_data, spot_range, vol_range, greek_name, "put")
+        show_figure(greek_surface(K, r, sigma, greek_method.lower(), spot_min, spot_max, vol_min, vol_max, "put", num_contracts_put, precision))
@@ -0,0 +1,103 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import streamlit as st
+from black_scholes import call_price, put_price
+from contracts import ContractBook, OptionContract, contract_price
+from portfolio import Portfolio, book_values, combine, position_values, random_portfolio
+from Potential_Trade_Strategies._1_Covered_Call import covered_call
+from Potential_Trade_Strategies._2_Protective_Put import protective_put
+from Potential_Trade_Strategies._3_Bull_Spread_Trades import bull_call_legs, bull_put_legs
+from Potential_Trade_Strategies._4_Bear_Spread_Trades import bear_call_legs, bear_put_legs
+from Potential_Trade_Strategies._5_Long_Butterfly_Trades import call_butterfly_legs as long_call_butterfly_legs
+from Potential_Trade_Strategies._6_Short_Butterfly_Trades import call_butterfly_legs as short_call_butterfly_legs
+from Potential_Trade_Strategies._7_Straddle_Trades import straddle_legs
+from Potential_Trade_Strategies._8_Strangle_Trades import strangle_legs
+
+# Every strategy of the strategy pages at the sidebar inputs: 5% spreads around K, premiums at model prices
+def template_strategies(S, K, T, r, sigma):
+    K1, K2 = K * 0.95, K * 1.05
+    call = {strike: call_price(S, strike, T, r, sigma) for strike in (K1, K, K2)}
+    put = {strike: put_price(S, strike, T, r, sigma) for strike in (K1, K, K2)}
+    strategies = [
+        covered_call(S, K, call[K]),
+        protective_put(S, K, put[K]),
+        bull_call_legs(K1, K2, call[K1], call[K2]),
+        bull_put_legs(K1, K2, put[K1], put[K2]),
+        bear_call_legs(K1, K2, call[K1], call[K2]),
+        bear_put_legs(K1, K2, put[K1], put[K2]),
+        long_call_butterfly_legs(K1, K, K2, call[K1], call[K], call[K2]),
+        short_call_butterfly_legs(K1, K, K2, call[K1], call[K], call[K2]),
+        straddle_legs(K, call[K], put[K], "long"),
+        straddle_legs(K, call[K], put[K], "short"),
+        strangle_legs(K1, K2, call[K2], put[K1], "long"),
+        strangle_legs(K1, K2, call[K2], put[K1], "short")
+    ]
+    return {strategy.name: strategy for strategy in strategies}
+
+# One contract per complete row of the single-options table; a blank expiry means the sidebar T
+# and a blank price means the contract was bought at its model price
+def contract_book(table, S, T, r, sigma):
+    contracts = []
+    for row in table.dropna(subset=["Type", "Strike", "Quantity"]).itertuples(index=False):
+        contract = OptionContract(S, float(row.Strike), T if pd.isna(row.Expiry) else float(row.Expiry), r, sigma, row.Type, 0.0, float(row.Quantity))
+        price = contract_price(contract) if pd.isna(row.Price) else row.Price
+        contracts.append(contract.replace(purchase_price=float(price)))
+    return ContractBook.from_contracts(contracts)
+
+def book_pnl_figure(portfolio, r, sigma, spot_min, spot_max, precision="float64"):
+    spot = np.linspace(spot_min, spot_max, 200)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(spot, book_values(portfolio, spot, r, sigma, precision)["P&L"], color='green', label='Book P&L (marked to model)')
+    ax.axhline(0, color='black', linewidth=0.5)
+    ax.set_xlabel('Spot Price')
+    ax.set_ylabel('Profit')
+    ax.set_title('Portfolio Profit')
+    ax.legend()
+    return fig
+
+def show_page(S, K, T, sigma, r, spot_min, spot_max):
+    st.markdown("""Combine any number of strategies into one book. Legs with the same kind, strike and expiry are netted and priced once.""")
+
+    templates = template_strategies(S, K, T, r, sigma)
+    selected = st.multiselect("Strategies in the portfolio", list(templates), default=list(templates)[:2], key="portfolio_strategies")
+    positions = []
+    columns = st.columns(4)
+    for index, name in enumerate(selected):
+        with columns[index % 4]:
+            units = st.number_input(f"Units of {name}", value=1.0, step=1.0, key=f"portfolio_units_{name}")
+        positions.append((templates[name], T, units))
+    random_positions = st.number_input("Add randomly generated positions", value=0, min_value=0, step=1000, key="portfolio_random_positions",
+                                       help="Vertical spreads and straddles on a listed strike x expiry grid, to try the book at scale")
+    st.markdown("**Single options** (negative quantity for a short position)")
+    single_options = st.data_editor(pd.DataFrame({"Type": pd.Series(dtype=str), "Strike": pd.Series(dtype=float), "Expiry": pd.Series(dtype=float),
+                                                  "Quantity": pd.Series(dtype=float), "Price": pd.Series(dtype=float)}),
+                                    num_rows="dynamic", key="portfolio_contracts",
+                                    column_config={"Type": st.column_config.SelectboxColumn(options=["call", "put"], default="call"),
+                                                   "Strike": st.column_config.NumberColumn(default=K),
+                                                   "Expiry": st.column_config.NumberColumn(default=T),
+                                                   "Quantity": st.column_config.NumberColumn(default=1.0)})
+    book = contract_book(single_options, S, T, r, sigma)
+
+    portfolios = [Portfolio.from_strategies(positions)]
+    if len(book):
+        portfolios.append(Portfolio.from_book(book, "Single Options"))
+    if random_positions:
+        portfolios.append(random_portfolio(int(random_positions), S))
+    portfolio = combine(*portfolios)
+    if not portfolio.num_legs:
+        st.info("Select at least one strategy.")
+        return
+    st.caption(f"{portfolio.num_legs:,} legs in {len(portfolio.names):,} positions netted into {portfolio.num_instruments:,} priced instruments")
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.subheader("Book Totals")
+        for field, value in book_values(portfolio, S, r, sigma).items():
+            st.markdown(f"**{field}:** {value:.4f}")
+    with col2:
+        st.subheader("Positions")
+        table = pd.DataFrame(position_values(portfolio, S, r, sigma), index=portfolio.names)
+        st.dataframe(table.head(500).round(4))
+
+    st.pyplot(book_pnl_figure(portfolio, r, sigma, spot_min, spot_max, st.session_state.hp_precision))
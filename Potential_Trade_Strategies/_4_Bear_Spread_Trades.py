@@ -1,10 +1,14 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from black_scholes import BlackScholes
+from implied_vol import implied_vol_labels
+from strategies import Leg, Strategy, strategy_greeks
+from strategy_plots import payoff_summary, strategy_heatmap, strategy_payoff_chart
+from figure_cache import cache_figure, show_figure
 
 def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
+    resolution = st.session_state.hp_resolution
+    model = st.session_state.hp_model
+    precision = st.session_state.hp_precision
     st.title("Bearish Spread Trades Strategies")
     st.markdown("""A bear spread strategy can be constructed with both calls and puts. The nature of the spread trade is slightly bearish with hedges for large volatility spikes.""")
     st.markdown("""**Construction with calls**: short call option at a lower strike price (K1) + long call option at a higher strike price (K2)""")
@@ -26,6 +30,7 @@ def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
         call_price2 = bs_call2.call_option_price()
         purchase_price_call1 = st.number_input("Lower Strike Call Price", value=call_price1, key="op_purchase_price_call1")
         purchase_price_call2 = st.number_input("Higher Strike Call Price", value=call_price2, key="op_purchase_price_call2")
+        st.caption("Implied volatility (K1, K2): " + ", ".join(implied_vol_labels([purchase_price_call1, purchase_price_call2], S, [K1_call, K2_call], T, r, "call")))
 
     with col2:
         spread_pct_put = st.number_input("Put Spread %", value=5.0, key="spread_pct_put")
@@ -38,182 +43,64 @@ def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
         put_price2 = bs_put2.put_option_price()
         purchase_price_put1 = st.number_input("Lower Strike Put Price", value=put_price2, key="op_purchase_price_put1")
         purchase_price_put2 = st.number_input("Higher Strike Put Price", value=put_price1, key="op_purchase_price_put2")
+        st.caption("Implied volatility (K1, K2): " + ", ".join(implied_vol_labels([purchase_price_put1, purchase_price_put2], S, [K1_put, K2_put], T, r, "put")))
 
     st.markdown("""**Disclaimer**: Deep out of the money losses are smaller because the cost of construction will be much cheaper for wider spread construction. Entering a position at current values will lead to max losses as shown in profit tables""")
 
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("### Bear Call Spread Heatmap")
-        heatmap_fig_call, profit_fig_call = bear_call_spread(S, K1_call, K2_call, T, sigma, r, purchase_price_call1, purchase_price_call2, spot_min, spot_max, vol_min, vol_max)
-        st.pyplot(heatmap_fig_call)
+        heatmap_fig_call, profit_fig_call = bear_call_spread(S, K1_call, K2_call, T, sigma, r, purchase_price_call1, purchase_price_call2, spot_min, spot_max, vol_min, vol_max, resolution=resolution, model=model, precision=precision)
+        show_figure(heatmap_fig_call)
     with col2:
         st.markdown("### Bear Put Spread Heatmap")
-        heatmap_fig_put, payoff_fig_put = bear_put_spread(S, K1_put, K2_put, T, sigma, r, purchase_price_put1, purchase_price_put2, spot_min, spot_max, vol_min, vol_max)
-        st.pyplot(heatmap_fig_put)
+        heatmap_fig_put, payoff_fig_put = bear_put_spread(S, K1_put, K2_put, T, sigma, r, purchase_price_put1, purchase_price_put2, spot_min, spot_max, vol_min, vol_max, resolution=resolution, model=model, precision=precision)
+        show_figure(heatmap_fig_put)
 
     col3, col4 = st.columns(2)
     with col3:
         st.markdown("### Bear Call Spread Profit")
-        st.pyplot(profit_fig_call)
+        show_figure(profit_fig_call)
+        st.caption(payoff_summary(bear_call_legs(K1_call, K2_call, purchase_price_call1, purchase_price_call2)))
     with col4:
         st.markdown("### Bear Put Spread Profit")
-        st.pyplot(payoff_fig_put)
-
-    bs_model_call1 = BlackScholes(S, K1_call, T, r, sigma, purchase_price_call1)
-    bs_model_call2 = BlackScholes(S, K2_call, T, r, sigma, purchase_price_call2)
-    bs_model_put1 = BlackScholes(S, K1_put, T, r, sigma, purchase_price_put1)
-    bs_model_put2 = BlackScholes(S, K2_put, T, r, sigma, purchase_price_put2)
+        show_figure(payoff_fig_put)
+        st.caption(payoff_summary(bear_put_legs(K1_put, K2_put, purchase_price_put1, purchase_price_put2)))
 
     col5, col6 = st.columns(2)
     with col5:
         st.write("### Combined Greeks for Bear Call Spread")
-        display_greeks(bs_model_call1, bs_model_call2, "call")
+        display_greeks(bear_call_legs(K1_call, K2_call, purchase_price_call1, purchase_price_call2), S, T, r, sigma)
     with col6:
         st.write("### Combined Greeks for Bear Put Spread")
-        display_greeks(bs_model_put1, bs_model_put2, "put")
-
-def bear_call_spread(S, K1_call, K2_call, T, sigma, r, purchase_price_call1, purchase_price_call2, spot_min, spot_max, vol_min, vol_max):
-    spot_range = np.linspace(spot_min, spot_max, 10)
-    vol_range = np.linspace(vol_min, vol_max, 10)
-
-    def plot_heatmap(K1_call, K2_call, purchase_price_call1, purchase_price_call2):
-        profits = np.zeros((len(vol_range), len(spot_range)))
-        for i, vol in enumerate(vol_range):
-            for j, spot in enumerate(spot_range):
-                bs_short = BlackScholes(spot, K1_call, T, r, vol, purchase_price_call1)
-                bs_long = BlackScholes(spot, K2_call, T, r, vol, purchase_price_call2)
-                short_call_price = bs_short.call_option_price()
-                long_call_price = bs_long.call_option_price()
-                short_call_profit = short_call_price - np.maximum(spot - K1_call, 0)
-                long_call_profit = np.maximum(spot - K2_call, 0) - long_call_price
-                profit = short_call_profit + long_call_profit
-                profits[i, j] = profit
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(profits[::-1], xticklabels=np.round(spot_range, 2), yticklabels=np.round(vol_range[::-1], 2), annot=True, fmt=".2f", cmap="RdYlGn", ax=ax, center=0)
-        ax.set_title('Bear Call Spread Profits')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Volatility')
-        return fig
-
-    def plot_payoff_chart():
-        spot_prices = np.linspace(spot_min, spot_max, 100)
-        short_call_profits = []
-        long_call_profits = []
-        total_profits = []
-
-        for spot in spot_prices:
-            short_call_profit = purchase_price_call1 - np.maximum(spot - K1_call, 0)
-            long_call_profit = np.maximum(spot - K2_call, 0) - purchase_price_call2
-            total_profit = short_call_profit + long_call_profit
-            
-            short_call_profits.append(short_call_profit)
-            long_call_profits.append(long_call_profit)
-            total_profits.append(total_profit)
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(spot_prices, total_profits, label='Bear Call Spread Profit', color='green')
-        ax.plot(spot_prices, short_call_profits, 'r--', label='Short Call Profit')
-        ax.plot(spot_prices, long_call_profits, 'b--', label='Long Call Profit')
-        ax.axhline(0, color='black', linewidth=0.5)
-        ax.axvline(K1_call, color='blue', linestyle='--', linewidth=0.5, label='Lower Strike Price (K1_call)')
-        ax.axvline(K2_call, color='red', linestyle='--', linewidth=0.5, label='Higher Strike Price (K2_call)')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Profit')
-        ax.set_title('Bear Call Spread Profit')
-        ax.legend()
-        return fig
-
-    return plot_heatmap(K1_call, K2_call, purchase_price_call1, purchase_price_call2), plot_payoff_chart()
-
-def bear_put_spread(S, K1_put, K2_put, T, sigma, r, purchase_price_put1, purchase_price_put2, spot_min, spot_max, vol_min, vol_max):
-    spot_range = np.linspace(spot_min, spot_max, 10)
-    vol_range = np.linspace(vol_min, vol_max, 10)
-
-    def plot_heatmap(K1_put, K2_put, purchase_price_put1, purchase_price_put2):
-        profits = np.zeros((len(vol_range), len(spot_range)))
-        for i, vol in enumerate(vol_range):
-            for j, spot in enumerate(spot_range):
-                bs_short = BlackScholes(spot, K1_put, T, r, vol, purchase_price_put1)
-                bs_long = BlackScholes(spot, K2_put, T, r, vol, purchase_price_put2)
-                short_put_price = bs_short.put_option_price()
-                long_put_price = bs_long.put_option_price()
-                short_put_profit = short_put_price - np.maximum(K1_put - spot, 0)
-                long_put_profit = np.maximum(K2_put - spot, 0) - long_put_price
-                profit = short_put_profit + long_put_profit
-                profits[i, j] = profit
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(profits[::-1], xticklabels=np.round(spot_range, 2), yticklabels=np.round(vol_range[::-1], 2), annot=True, fmt=".2f", cmap="RdYlGn", ax=ax, center=0)
-        ax.set_title('Bear Put Spread Profits')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Volatility')
-        return fig
-
-    def plot_payoff_chart():
-        spot_prices = np.linspace(spot_min, spot_max, 100)
-        short_put_profits = []
-        long_put_profits = []
-        total_profits = []
-
-        for spot in spot_prices:
-            short_put_profit = purchase_price_put1 - np.maximum(K1_put - spot, 0)
-            long_put_profit = np.maximum(K2_put - spot, 0) - purchase_price_put2
-            total_profit = short_put_profit + long_put_profit
-            
-            short_put_profits.append(short_put_profit)
-            long_put_profits.append(long_put_profit)
-            total_profits.append(total_profit)
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(spot_prices, total_profits, label='Bear Put Spread Profit', color='green')
-        ax.plot(spot_prices, short_put_profits, 'r--', label='Short Put Profit')
-        ax.plot(spot_prices, long_put_profits, 'b--', label='Long Put Profit')
-        ax.axhline(0, color='black', linewidth=0.5)
-        ax.axvline(K1_put, color='blue', linestyle='--', linewidth=0.5, label='Lower Strike Price (K1_put)')
-        ax.axvline(K2_put, color='red', linestyle='--', linewidth=0.5, label='Higher Strike Price (K2_put)')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Profit')
-        ax.set_title('Bear Put Spread Profit')
-        ax.legend()
-        return fig
-
-    return plot_heatmap(K1_put, K2_put, purchase_price_put1, purchase_price_put2), plot_payoff_chart()
-
-def calculate_combined_greeks(bs_model1, bs_model2, option_type):
-    greeks1 = {
-        "Delta": bs_model1.delta(option_type),
-        "Gamma": bs_model1.gamma(),
-        "Vega": bs_model1.vega(),
-        "Rho": bs_model1.rho(option_type),
-        "Theta": bs_model1.theta(option_type)
-    }
-    greeks2 = {
-        "Delta": bs_model2.delta(option_type),
-        "Gamma": bs_model2.gamma(),
-        "Vega": bs_model2.vega(),
-        "Rho": bs_model2.rho(option_type),
-        "Theta": bs_model2.theta(option_type)
-    }
-    combined_greeks = {k: greeks1[k] + greeks2[k] for k in greeks1.keys()}
-    return combined_greeks
-
-def display_greeks(bs_model1, bs_model2, option_type):
-    greeks1 = {
-        "Delta": bs_model1.delta(option_type),
-        "Gamma": bs_model1.gamma(),
-        "Vega": bs_model1.vega(),
-        "Rho": bs_model1.rho(option_type),
-        "Theta": bs_model1.theta(option_type)
-    }
-    greeks2 = {
-        "Delta": bs_model2.delta(option_type),
-        "Gamma": bs_model2.gamma(),
-        "Vega": bs_model2.vega(),
-        "Rho": bs_model2.rho(option_type),
-        "Theta": bs_model2.theta(option_type)
-    }
-    combined_greeks = {k: greeks1[k] + greeks2[k] for k in greeks1.keys()}
-    
-    for greek, value in combined_greeks.items():
-        st.markdown(f"**{greek}:** {value:.4f}")
\ No newline at end of file
+        display_greeks(bear_put_legs(K1_put, K2_put, purchase_price_put1, purchase_price_put2), S, T, r, sigma)
+
+# Short call at K1, long call at K2
+def bear_call_legs(K1_call, K2_call, purchase_price_call1, purchase_price_call2):
+    return Strategy("Bear Call Spread", [Leg("call", K1_call, 1, "short", purchase_price_call1), Leg("call", K2_call, 1, "long", purchase_price_call2)])
+
+# Short put at K1, long put at K2
+def bear_put_legs(K1_put, K2_put, purchase_price_put1, purchase_price_put2):
+    return Strategy("Bear Put Spread", [Leg("put", K1_put, 1, "short", purchase_price_put1), Leg("put", K2_put, 1, "long", purchase_price_put2)])
+
+@cache_figure
+def bear_call_spread(S, K1_call, K2_call, T, sigma, r, purchase_price_call1, purchase_price_call2, spot_min, spot_max, vol_min, vol_max, resolution="standard", model="black_scholes", precision="float64"):
+    strategy = bear_call_legs(K1_call, K2_call, purchase_price_call1, purchase_price_call2)
+    heatmap_fig = strategy_heatmap(strategy, T, r, spot_min, spot_max, vol_min, vol_max, 'Bear Call Spread Profits', resolution=resolution, model=model, precision=precision)
+    payoff_fig = strategy_payoff_chart(strategy, spot_min, spot_max, 'Bear Call Spread Profit', 'Bear Call Spread Profit',
+                                       [('Short Call Profit', 'r--'), ('Long Call Profit', 'b--')],
+                                       [(K1_call, 'blue', 'Lower Strike Price (K1_call)'), (K2_call, 'red', 'Higher Strike Price (K2_call)')])
+    return heatmap_fig, payoff_fig
+
+@cache_figure
+def bear_put_spread(S, K1_put, K2_put, T, sigma, r, purchase_price_put1, purchase_price_put2, spot_min, spot_max, vol_min, vol_max, resolution="standard", model="black_scholes", precision="float64"):
+    strategy = bear_put_legs(K1_put, K2_put, purchase_price_put1, purchase_price_put2)
+    heatmap_fig = strategy_heatmap(strategy, T, r, spot_min, spot_max, vol_min, vol_max, 'Bear Put Spread Profits', resolution=resolution, model=model, precision=precision)
+    payoff_fig = strategy_payoff_chart(strategy, spot_min, spot_max, 'Bear Put Spread Profit', 'Bear Put Spread Profit',
+                                       [('Short Put Profit', 'r--'), ('Long Put Profit', 'b--')],
+                                       [(K1_put, 'blue', 'Lower Strike Price (K1_put)'), (K2_put, 'red', 'Higher Strike Price (K2_put)')])
+    return heatmap_fig, payoff_fig
+
+def display_greeks(strategy, S, T, r, sigma):
+    for greek, value in strategy_greeks(strategy, S, T, r, sigma).items():
+        st.markdown(f"**{greek}:** {value:.4f}")
@@ -1,10 +1,14 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from black_scholes import BlackScholes
+from implied_vol import implied_vol_labels
+from strategies import Leg, Strategy, net_premium, strategy_greeks
+from strategy_plots import payoff_summary, strategy_heatmap, strategy_payoff_chart
+from figure_cache import cache_figure, show_figure
 
 def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
+    resolution = st.session_state.hp_resolution
+    model = st.session_state.hp_model
+    precision = st.session_state.hp_precision
     st.title("Short (Bearish) Butterfly Put Spread Strategies")
     st.markdown("""A short butterfly spread strategy can be constructed with both calls and puts. The nature of the spread trade is a bet against low volatility, where high volatility moves allow you to pocket premia.""")
     st.markdown("""**Construction with calls**: short 1 call option at a lower strike price (K1), long 2 calls at a middle strike price (K2), and short 1 put option at a higher strike price (K3)""")
@@ -30,6 +34,7 @@ def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
         purchase_price_call1 = st.number_input("Lower Strike Call Price", value=call_price1, key="op_purchase_price_call1")
         purchase_price_call2 = st.number_input("Middle Strike Call Price", value=call_price2, key="op_purchase_price_call2")
         purchase_price_call3 = st.number_input("Higher Strike Call Price", value=call_price3, key="op_purchase_price_call3")
+        st.caption("Implied volatility (K1, K2, K3): " + ", ".join(implied_vol_labels([purchase_price_call1, purchase_price_call2, purchase_price_call3], S, [K1_call, K2_call, K3_call], T, r, "call")))
 
     with col2:
         spread_pct_put = st.number_input("Put Spread %", value=5.0, key="spread_pct_put")
@@ -46,194 +51,70 @@ def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
         purchase_price_put1 = st.number_input("Lower Strike Put Price", value=put_price1, key="op_purchase_price_put1")
         purchase_price_put2 = st.number_input("Middle Strike Put Price", value=put_price2, key="op_purchase_price_put2")
         purchase_price_put3 = st.number_input("Higher Strike Put Price", value=put_price3, key="op_purchase_price_put3")
+        st.caption("Implied volatility (K1, K2, K3): " + ", ".join(implied_vol_labels([purchase_price_put1, purchase_price_put2, purchase_price_put3], S, [K1_put, K2_put, K3_put], T, r, "put")))
 
     # Calculate Net Premiums
-    net_premium_call = purchase_price_call1 + 2 * purchase_price_call2 + purchase_price_call3
-    net_premium_put = purchase_price_put1 + 2 * purchase_price_put2 + purchase_price_put3
+    net_premium_call = net_premium(call_butterfly_legs(K1_call, K2_call, K3_call, purchase_price_call1, purchase_price_call2, purchase_price_call3))
+    net_premium_put = net_premium(put_butterfly_legs(K1_put, K2_put, K3_put, purchase_price_put1, purchase_price_put2, purchase_price_put3))
 
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("### Short Butterfly Call Spread Heatmap")
-        heatmap_fig_call, profit_fig_call = call_butterfly_spread(S, K1_call, K2_call, K3_call, T, sigma, r, purchase_price_call1, purchase_price_call2, purchase_price_call3, spot_min, spot_max, vol_min, vol_max)
-        st.pyplot(heatmap_fig_call)
+        heatmap_fig_call, profit_fig_call = call_butterfly_spread(S, K1_call, K2_call, K3_call, T, sigma, r, purchase_price_call1, purchase_price_call2, purchase_price_call3, spot_min, spot_max, vol_min, vol_max, resolution=resolution, model=model, precision=precision)
+        show_figure(heatmap_fig_call)
     with col2:
         st.markdown("### Short Butterfly Put Spread Heatmap")
-        heatmap_fig_put, payoff_fig_put = put_butterfly_spread(S, K1_put, K2_put, K3_put, T, sigma, r, purchase_price_put1, purchase_price_put2, purchase_price_put3, spot_min, spot_max, vol_min, vol_max)
-        st.pyplot(heatmap_fig_put)
+        heatmap_fig_put, payoff_fig_put = put_butterfly_spread(S, K1_put, K2_put, K3_put, T, sigma, r, purchase_price_put1, purchase_price_put2, purchase_price_put3, spot_min, spot_max, vol_min, vol_max, resolution=resolution, model=model, precision=precision)
+        show_figure(heatmap_fig_put)
 
     col3, col4 = st.columns(2)
     with col3:
         st.markdown("### Short Butterfly Call Spread Profit")
-        st.pyplot(profit_fig_call)
+        show_figure(profit_fig_call)
+        st.caption(payoff_summary(call_butterfly_legs(K1_call, K2_call, K3_call, purchase_price_call1, purchase_price_call2, purchase_price_call3)))
         st.write(f"Net Premium for Call Butterfly Spread: {net_premium_call:.2f}")
     with col4:
         st.markdown("### Short Butterfly Put Spread Profit")
-        st.pyplot(payoff_fig_put)
+        show_figure(payoff_fig_put)
+        st.caption(payoff_summary(put_butterfly_legs(K1_put, K2_put, K3_put, purchase_price_put1, purchase_price_put2, purchase_price_put3)))
         st.write(f"Net Premium for Put Butterfly Spread: {net_premium_put:.2f}")
 
-    bs_model_call1 = BlackScholes(S, K1_call, T, r, sigma, purchase_price_call1)
-    bs_model_call2 = BlackScholes(S, K2_call, T, r, sigma, purchase_price_call2)
-    bs_model_call3 = BlackScholes(S, K3_call, T, r, sigma, purchase_price_call3)
-    bs_model_put1 = BlackScholes(S, K1_put, T, r, sigma, purchase_price_put1)
-    bs_model_put2 = BlackScholes(S, K2_put, T, r, sigma, purchase_price_put2)
-    bs_model_put3 = BlackScholes(S, K3_put, T, r, sigma, purchase_price_put3)
-
     col5, col6 = st.columns(2)
     with col5:
         st.write("### Combined Greeks for Bear Call Spread")
-        display_greeks(bs_model_call1, bs_model_call2, bs_model_call3, "call")
+        display_greeks(call_butterfly_legs(K1_call, K2_call, K3_call, purchase_price_call1, purchase_price_call2, purchase_price_call3), S, T, r, sigma)
     with col6:
         st.write("### Combined Greeks for Bear Put Spread")
-        display_greeks(bs_model_put1, bs_model_put2, bs_model_put3, "put")
-
-def call_butterfly_spread(S, K1, K2, K3, T, sigma, r, purchase_price_call1, purchase_price_call2, purchase_price_call3, spot_min, spot_max, vol_min, vol_max):
-    spot_range = np.linspace(spot_min, spot_max, 10)
-    vol_range = np.linspace(vol_min, vol_max, 10)
-
-    def plot_heatmap(K1, K2, K3, purchase_price_call1, purchase_price_call2, purchase_price_call3):
-        profits = np.zeros((len(vol_range), len(spot_range)))
-        for i, vol in enumerate(vol_range):
-            for j, spot in enumerate(spot_range):
-                bs_short_k1 = BlackScholes(spot, K1, T, r, vol, purchase_price_call1)
-                bs_long_k2 = BlackScholes(spot, K2, T, r, vol, purchase_price_call2)
-                bs_short_k3 = BlackScholes(spot, K3, T, r, vol, purchase_price_call3)
-                short_K1_call_price = bs_short_k1.call_option_price()
-                long_K2_call_price = bs_long_k2.call_option_price()
-                short_K3_call_price = bs_short_k3.call_option_price()
-                short_K1_call_profit = short_K1_call_price - np.maximum(spot - K1, 0)
-                long_K2_call_profit = np.maximum(spot - K2, 0) - long_K2_call_price
-                short_K3_call_profit = short_K3_call_price - np.maximum(spot - K3, 0)
-                profit = short_K1_call_profit + (2 * long_K2_call_profit) + short_K3_call_profit
-                profits[i, j] = profit
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(profits[::-1], xticklabels=np.round(spot_range, 2), yticklabels=np.round(vol_range[::-1], 2), annot=True, fmt=".2f", cmap="RdYlGn", ax=ax, center=0)
-        ax.set_title('Butterfly Spread Profits')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Volatility')
-        return fig
-
-    def plot_payoff_chart():
-        spot_prices = np.linspace(spot_min, spot_max, 100)
-        short_k1_call_profits = []
-        long_k2_call_profits = []
-        short_k3_call_profits = []
-        total_profits = []
-
-        for spot in spot_prices:
-            short_k1_call_profit = purchase_price_call1 - np.maximum(spot - K1, 0)
-            long_k2_call_profit = np.maximum(spot - K2, 0) - purchase_price_call2
-            short_k3_call_profit = purchase_price_call3 - np.maximum(spot - K3, 0)
-            total_profit = short_k1_call_profit + (2 * long_k2_call_profit) + short_k3_call_profit
-            
-            short_k1_call_profits.append(short_k1_call_profit)
-            long_k2_call_profits.append(long_k2_call_profit)
-            short_k3_call_profits.append(short_k3_call_profit)
-            total_profits.append(total_profit)
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(spot_prices, total_profits, label='Butterfly Spread Profit', color='green')
-        ax.plot(spot_prices, short_k1_call_profits, 'b--', label='Short K1 Call Profit')
-        ax.plot(spot_prices, long_k2_call_profits, 'r--', label='Long K2 Calls Profit')
-        ax.plot(spot_prices, short_k3_call_profits, 'g--', label='Short K3 Call Profit')
-        ax.axhline(0, color='black', linewidth=0.5)
-        ax.axvline(K1, color='blue', linestyle='--', linewidth=0.5, label='Lower Strike Price (K1)')
-        ax.axvline(K2, color='red', linestyle='--', linewidth=0.5, label='Middle Strike Price (K2)')
-        ax.axvline(K3, color='green', linestyle='--', linewidth=0.5, label='Higher Strike Price (K3)')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Profit')
-        ax.set_title('Butterfly Spread Profit')
-        ax.legend()
-        return fig
-
-    return plot_heatmap(K1, K2, K3, purchase_price_call1, purchase_price_call2, purchase_price_call3), plot_payoff_chart()
-
-def put_butterfly_spread(S, K1, K2, K3, T, sigma, r, purchase_price_put1, purchase_price_put2, purchase_price_put3, spot_min, spot_max, vol_min, vol_max):
-    spot_range = np.linspace(spot_min, spot_max, 10)
-    vol_range = np.linspace(vol_min, vol_max, 10)
-
-    def plot_heatmap(K1, K2, K3, purchase_price_put1, purchase_price_put2, purchase_price_put3):
-        profits = np.zeros((len(vol_range), len(spot_range)))
-        for i, vol in enumerate(vol_range):
-            for j, spot in enumerate(spot_range):
-                bs_short_k1 = BlackScholes(spot, K1, T, r, vol, purchase_price_put1)
-                bs_long_k2 = BlackScholes(spot, K2, T, r, vol, purchase_price_put2)
-                bs_short_k3 = BlackScholes(spot, K3, T, r, vol, purchase_price_put3)
-                short_k1_put_price = bs_short_k1.put_option_price()
-                long_k2_put_price = bs_long_k2.put_option_price()
-                short_k3_put_price = bs_short_k3.put_option_price()
-                short_k1_put_profit = short_k1_put_price - np.maximum(K1 - spot, 0) 
-                long_k2_put_profit = np.maximum(K2 - spot, 0) - long_k2_put_price    
-                short_k3_put_profit = short_k3_put_price - np.maximum(K3 - spot, 0)
-                profit = short_k1_put_profit + (2 * long_k2_put_profit) + short_k3_put_profit
-                profits[i, j] = profit
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(profits[::-1], xticklabels=np.round(spot_range, 2), yticklabels=np.round(vol_range[::-1], 2), annot=True, fmt=".2f", cmap="RdYlGn", ax=ax, center=0)
-        ax.set_title('Butterfly Spread Profits')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Volatility')
-        return fig
-
-    def plot_payoff_chart():
-        spot_prices = np.linspace(spot_min, spot_max, 100)
-        short_k1_put_profits = []
-        long_k2_put_profits = []
-        short_k3_put_profits = []
-        total_profits = []
-
-        for spot in spot_prices:
-            short_k1_put_profit = purchase_price_put1 - np.maximum(K1 - spot, 0) 
-            long_k2_put_profit = np.maximum(K2 - spot, 0) - purchase_price_put2        
-            short_k3_put_profit = purchase_price_put3 - np.maximum(K3 - spot, 0)
-
-            total_profit = short_k1_put_profit + (2 * long_k2_put_profit) + short_k3_put_profit
-            
-            short_k1_put_profits.append(short_k1_put_profit)
-            long_k2_put_profits.append(long_k2_put_profit)
-            short_k3_put_profits.append(short_k3_put_profit)
-            total_profits.append(total_profit)
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(spot_prices, total_profits, label='Butterfly Spread Profit', color='green')
-        ax.plot(spot_prices, short_k1_put_profits, 'b--', label='Long K1 Put Profit')
-        ax.plot(spot_prices, long_k2_put_profits, 'r--', label='Short K2 Put Profit')
-        ax.plot(spot_prices, short_k3_put_profits, 'g--', label='Long K3 Put Profit')
-        ax.axhline(0, color='black', linewidth=0.5)
-        ax.axvline(K1, color='blue', linestyle='--', linewidth=0.5, label='Lower Strike Price (K1)')
-        ax.axvline(K2, color='red', linestyle='--', linewidth=0.5, label='Middle Strike Price (K2)')
-        ax.axvline(K3, color='green', linestyle='--', linewidth=0.5, label='Higher Strike Price (K3)')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Profit')
-        ax.set_title('Butterfly Spread Profit')
-        ax.legend()
-        return fig
-
-    return plot_heatmap(K1, K2, K3, purchase_price_put1, purchase_price_put2, purchase_price_put3), plot_payoff_chart()
-
-def display_greeks(bs_model1, bs_model2, bs_model3, option_type):
-    greeks1 = {
-        "Delta": bs_model1.delta(option_type),
-        "Gamma": bs_model1.gamma(),
-        "Vega": bs_model1.vega(),
-        "Rho": bs_model1.rho(option_type),
-        "Theta": bs_model1.theta(option_type)
-    }
-    greeks2 = {
-        "Delta": bs_model2.delta(option_type),
-        "Gamma": bs_model2.gamma(),
-        "Vega": bs_model2.vega(),
-        "Rho": bs_model2.rho(option_type),
-        "Theta": bs_model2.theta(option_type)
-    }
-    greeks3 = {
-        "Delta": bs_model3.delta(option_type),
-        "Gamma": bs_model3.gamma(),
-        "Vega": bs_model3.vega(),
-        "Rho": bs_model3.rho(option_type),
-        "Theta": bs_model3.theta(option_type)
-    }
-    combined_greeks = {k: greeks1[k] + 2 * greeks2[k] + greeks3[k] for k in greeks1.keys()}
-    
-    for greek, value in combined_greeks.items():
+        display_greeks(put_butterfly_legs(K1_put, K2_put, K3_put, purchase_price_put1, purchase_price_put2, purchase_price_put3), S, T, r, sigma)
+
+# Short one call at K1, long two at K2, short one at K3
+def call_butterfly_legs(K1, K2, K3, purchase_price_call1, purchase_price_call2, purchase_price_call3):
+    return Strategy("Short Call Butterfly", [Leg("call", K1, 1, "short", purchase_price_call1), Leg("call", K2, 2, "long", purchase_price_call2),
+                                               Leg("call", K3, 1, "short", purchase_price_call3)])
+
+# Short one put at K1, long two at K2, short one at K3
+def put_butterfly_legs(K1, K2, K3, purchase_price_put1, purchase_price_put2, purchase_price_put3):
+    return Strategy("Short Put Butterfly", [Leg("put", K1, 1, "short", purchase_price_put1), Leg("put", K2, 2, "long", purchase_price_put2),
+                                              Leg("put", K3, 1, "short", purchase_price_put3)])
+
+@cache_figure
+def call_butterfly_spread(S, K1, K2, K3, T, sigma, r, purchase_price_call1, purchase_price_call2, purchase_price_call3, spot_min, spot_max, vol_min, vol_max, resolution="standard", model="black_scholes", precision="float64"):
+    strategy = call_butterfly_legs(K1, K2, K3, purchase_price_call1, purchase_price_call2, purchase_price_call3)
+    heatmap_fig = strategy_heatmap(strategy, T, r, spot_min, spot_max, vol_min, vol_max, 'Butterfly Spread Profits', resolution=resolution, model=model, precision=precision)
+    payoff_fig = strategy_payoff_chart(strategy, spot_min, spot_max, 'Butterfly Spread Profit', 'Butterfly Spread Profit',
+                                       [('Short K1 Call Profit', 'b--'), ('Long K2 Calls Profit', 'r--'), ('Short K3 Call Profit', 'g--')],
+                                       [(K1, 'blue', 'Lower Strike Price (K1)'), (K2, 'red', 'Middle Strike Price (K2)'), (K3, 'green', 'Higher Strike Price (K3)')])
+    return heatmap_fig, payoff_fig
+
+@cache_figure
+def put_butterfly_spread(S, K1, K2, K3, T, sigma, r, purchase_price_put1, purchase_price_put2, purchase_price_put3, spot_min, spot_max, vol_min, vol_max, resolution="standard", model="black_scholes", precision="float64"):
+    strategy = put_butterfly_legs(K1, K2, K3, purchase_price_put1, purchase_price_put2, purchase_price_put3)
+    heatmap_fig = strategy_heatmap(strategy, T, r, spot_min, spot_max, vol_min, vol_max, 'Butterfly Spread Profits', resolution=resolution, model=model, precision=precision)
+    payoff_fig = strategy_payoff_chart(strategy, spot_min, spot_max, 'Butterfly Spread Profit', 'Butterfly Spread Profit',
+                                       [('Long K1 Put Profit', 'b--'), ('Short K2 Put Profit', 'r--'), ('Long K3 Put Profit', 'g--')],
+                                       [(K1, 'blue', 'Lower Strike Price (K1)'), (K2, 'red', 'Middle Strike Price (K2)'), (K3, 'green', 'Higher Strike Price (K3)')])
+    return heatmap_fig, payoff_fig
+
+def display_greeks(strategy, S, T, r, sigma):
+    for greek, value in strategy_greeks(strategy, S, T, r, sigma).items():
         st.markdown(f"**{greek}:** {value:.4f}")
@@ -1,10 +1,16 @@
-import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import streamlit as st
 from black_scholes import BlackScholes
+from implied_vol import implied_vol_labels
+from strategies import Leg, Strategy, net_premium, strategy_greeks
+from scenario_cube import AXES, AXIS_LABELS, strategy_cube
+from strategy_plots import cube_heatmap, payoff_summary, strategy_heatmap, strategy_payoff_chart
+from figure_cache import cache_figure, cache_grid, show_figure
 
 def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
+    resolution = st.session_state.hp_resolution
+    model = st.session_state.hp_model
+    precision = st.session_state.hp_precision
     st.title("Straddle Trade Strategies")
     
     col1, col2 = st.columns(2)
@@ -24,22 +30,24 @@ def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
         put_price_long = bs_put_long.put_option_price()
         purchase_price_call_long = st.number_input("Call Option Price (Long Straddle)", value=call_price_long, key="long_straddle_purchase_price_call")
         purchase_price_put_long = st.number_input("Put Option Price (Long Straddle)", value=put_price_long, key="long_straddle_purchase_price_put")
+        st.caption("Implied volatility (call, put): " + ", ".join(implied_vol_labels([purchase_price_call_long, purchase_price_put_long], S, K, T, r, ["call", "put"])))
 
         st.markdown("### Long Straddle Heatmap")
-        heatmap_fig_long_straddle, profit_fig_long_straddle = straddle_spread(S, K, T, sigma, r, purchase_price_call_long, purchase_price_put_long, spot_min, spot_max, vol_min, vol_max, strategy='long')
-        st.pyplot(heatmap_fig_long_straddle)
+        heatmap_fig_long_straddle, profit_fig_long_straddle = straddle_spread(S, K, T, sigma, r, purchase_price_call_long, purchase_price_put_long, spot_min, spot_max, vol_min, vol_max, strategy='long', resolution=resolution, model=model, precision=precision)
+        show_figure(heatmap_fig_long_straddle)
 
         st.markdown("### Long Straddle Profit")
-        st.pyplot(profit_fig_long_straddle)
+        show_figure(profit_fig_long_straddle)
+        st.caption(payoff_summary(straddle_legs(K, purchase_price_call_long, purchase_price_put_long, "long")))
 
-        net_premium_long_straddle = purchase_price_call_long + purchase_price_put_long
+        net_premium_long_straddle = net_premium(straddle_legs(K, purchase_price_call_long, purchase_price_put_long, "long"))
         st.write(f"Net Premium for Long Straddle: {net_premium_long_straddle:.2f}")
 
-        bs_model_call_long = BlackScholes(S, K, T, r, sigma, purchase_price_call_long)
-        bs_model_put_long = BlackScholes(S, K, T, r, sigma, purchase_price_put_long)
-
         st.write("### Combined Greeks for Long Straddle")
-        display_greeks(bs_model_call_long, bs_model_put_long, "straddle")
+        display_greeks(straddle_legs(K, purchase_price_call_long, purchase_price_put_long, "long"), S, T, r, sigma)
+
+        st.markdown("### Long Straddle Scenario Explorer")
+        scenario_explorer(straddle_cube(K, T, r, purchase_price_call_long, purchase_price_put_long, spot_min, spot_max, vol_min, vol_max, "long", model, precision), "long_straddle")
 
     with col2:
         st.header("Short Straddle")
@@ -56,99 +64,57 @@ def show_page(S, K, T, sigma, r, spot_min, spot_max, vol_min, vol_max):
         put_price_short = bs_put_short.put_option_price()
         purchase_price_call_short = st.number_input("Call Option Price (Short Straddle)", value=call_price_short, key="short_straddle_purchase_price_call")
         purchase_price_put_short = st.number_input("Put Option Price (Short Straddle)", value=put_price_short, key="short_straddle_purchase_price_put")
+        st.caption("Implied volatility (call, put): " + ", ".join(implied_vol_labels([purchase_price_call_short, purchase_price_put_short], S, K, T, r, ["call", "put"])))
 
         st.markdown("### Short Straddle Heatmap")
-        heatmap_fig_short_straddle, profit_fig_short_straddle = straddle_spread(S, K, T, sigma, r, purchase_price_call_short, purchase_price_put_short, spot_min, spot_max, vol_min, vol_max, strategy='short')
-        st.pyplot(heatmap_fig_short_straddle)
+        heatmap_fig_short_straddle, profit_fig_short_straddle = straddle_spread(S, K, T, sigma, r, purchase_price_call_short, purchase_price_put_short, spot_min, spot_max, vol_min, vol_max, strategy='short', resolution=resolution, model=model, precision=precision)
+        show_figure(heatmap_fig_short_straddle)
 
         st.markdown("### Short Straddle Profit")
-        st.pyplot(profit_fig_short_straddle)
+        show_figure(profit_fig_short_straddle)
+        st.caption(payoff_summary(straddle_legs(K, purchase_price_call_short, purchase_price_put_short, "short")))
 
-        net_premium_short_straddle = purchase_price_call_short + purchase_price_put_short
+        net_premium_short_straddle = net_premium(straddle_legs(K, purchase_price_call_short, purchase_price_put_short, "short"))
         st.write(f"Net Premium for Short Straddle: {net_premium_short_straddle:.2f}")
 
-        bs_model_call_short = BlackScholes(S, K, T, r, sigma, purchase_price_call_short)
-        bs_model_put_short = BlackScholes(S, K, T, r, sigma, purchase_price_put_short)
-
         st.write("### Combined Greeks for Short Straddle")
-        display_greeks(bs_model_call_short, bs_model_put_short, "straddle")
-
-def straddle_spread(S, K, T, sigma, r, purchase_price_call, purchase_price_put, spot_min, spot_max, vol_min, vol_max, strategy='long'):
-    spot_range = np.linspace(spot_min, spot_max, 10)
-    vol_range = np.linspace(vol_min, vol_max, 10)
-
-    def plot_heatmap(K, purchase_price_call, purchase_price_put, strategy):
-        profits = np.zeros((len(vol_range), len(spot_range)))
-        for i, vol in enumerate(vol_range):
-            for j, spot in enumerate(spot_range):
-                bs_call = BlackScholes(spot, K, T, r, vol, purchase_price_call)
-                bs_put = BlackScholes(spot, K, T, r, vol, purchase_price_put)
-                call_price = bs_call.call_option_price()
-                put_price = bs_put.put_option_price()
-                if strategy == 'long':
-                    call_profit = np.maximum(spot - K, 0) - call_price
-                    put_profit = np.maximum(K - spot, 0) - put_price
-                elif strategy == 'short':
-                    call_profit = call_price - np.maximum(spot - K, 0)
-                    put_profit = put_price - np.maximum(K - spot, 0)
-                profit = call_profit + put_profit
-                profits[i, j] = profit
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(profits[::-1], xticklabels=np.round(spot_range, 2), yticklabels=np.round(vol_range[::-1], 2), annot=True, fmt=".2f", cmap="RdYlGn", ax=ax, center=0)
-        ax.set_title(f'{strategy.capitalize()} Straddle Profits')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Volatility')
-        return fig
-
-    def plot_payoff_chart():
-        spot_prices = np.linspace(spot_min, spot_max, 100)
-        call_profits = []
-        put_profits = []
-        total_profits = []
-
-        for spot in spot_prices:
-            if strategy == 'long':
-                call_profit = np.maximum(spot - K, 0) - purchase_price_call
-                put_profit = np.maximum(K - spot, 0) - purchase_price_put
-            elif strategy == 'short':
-                call_profit = purchase_price_call - np.maximum(spot - K, 0)
-                put_profit = purchase_price_put - np.maximum(K - spot, 0)
-            total_profit = call_profit + put_profit
-            
-            call_profits.append(call_profit)
-            put_profits.append(put_profit)
-            total_profits.append(total_profit)
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(spot_prices, total_profits, label=f'{strategy.capitalize()} Straddle Profit', color='green')
-        ax.plot(spot_prices, call_profits, 'b--', label='Call Profit')
-        ax.plot(spot_prices, put_profits, 'r--', label='Put Profit')
-        ax.axhline(0, color='black', linewidth=0.5)
-        ax.axvline(K, color='blue', linestyle='--', linewidth=0.5, label='Strike Price (K)')
-        ax.set_xlabel('Spot Price')
-        ax.set_ylabel('Profit')
-        ax.set_title(f'{strategy.capitalize()} Straddle Profit')
-        ax.legend()
-        return fig
-
-    return plot_heatmap(K, purchase_price_call, purchase_price_put, strategy), plot_payoff_chart()
-
-def display_greeks(bs_model_call, bs_model_put, strategy):
-    call_greeks = {
-        "Delta": bs_model_call.delta("call"),
-        "Gamma": bs_model_call.gamma(),
-        "Vega": bs_model_call.vega(),
-        "Rho": bs_model_call.rho("call"),
-        "Theta": bs_model_call.theta("call")
-    }
-    put_greeks = {
-        "Delta": bs_model_put.delta("put"),
-        "Gamma": bs_model_put.gamma(),
-        "Vega": bs_model_put.vega(),
-        "Rho": bs_model_put.rho("put"),
-        "Theta": bs_model_put.theta("put")
-    }
-    combined_greeks = {k: call_greeks[k] + put_greeks[k] for k in call_greeks.keys()}
-    for greek, value in combined_greeks.items():
+        display_greeks(straddle_legs(K, purchase_price_call_short, purchase_price_put_short, "short"), S, T, r, sigma)
+
+# One call and one put at the same strike, both bought ('long') or both sold ('short')
+def straddle_legs(K, purchase_price_call, purchase_price_put, strategy='long'):
+    return Strategy(f"{strategy.capitalize()} Straddle", [Leg("call", K, 1, strategy, purchase_price_call), Leg("put", K, 1, strategy, purchase_price_put)])
+
+@cache_figure
+def straddle_spread(S, K, T, sigma, r, purchase_price_call, purchase_price_put, spot_min, spot_max, vol_min, vol_max, strategy='long', resolution="standard", model="black_scholes", precision="float64"):
+    legs = straddle_legs(K, purchase_price_call, purchase_price_put, strategy)
+    heatmap_fig = strategy_heatmap(legs, T, r, spot_min, spot_max, vol_min, vol_max, f'{strategy.capitalize()} Straddle Profits', resolution=resolution, model=model, precision=precision)
+    payoff_fig = strategy_payoff_chart(legs, spot_min, spot_max, f'{strategy.capitalize()} Straddle Profit', f'{strategy.capitalize()} Straddle Profit',
+                                       [('Call Profit', 'b--'), ('Put Profit', 'r--')], [(K, 'blue', 'Strike Price (K)')])
+    return heatmap_fig, payoff_fig
+
+# Long/short straddle P&L over spot x vol x time to expiry x rate, priced once and sliced by the explorer
+@cache_grid
+def straddle_cube(K, T, r, purchase_price_call, purchase_price_put, spot_min, spot_max, vol_min, vol_max, strategy='long', model="black_scholes", precision="float64"):
+    legs = straddle_legs(K, purchase_price_call, purchase_price_put, strategy)
+    return strategy_cube(legs, np.linspace(spot_min, spot_max, 10), np.linspace(vol_min, vol_max, 10),
+                         np.linspace(T / 10, T, 10), np.linspace(max(r - 0.02, 0.0), r + 0.02, 5), model=model, precision=precision)
+
+# Pick any two axes of the cube to plot and pin the others; every choice is a view of the same cube
+def scenario_explorer(cube, key):
+    with st.expander("Plot any two scenario axes"):
+        col1, col2 = st.columns(2)
+        with col1:
+            rows = st.selectbox("Rows", AXES, index=1, format_func=AXIS_LABELS.get, key=f"{key}_rows")
+        with col2:
+            columns = st.selectbox("Columns", [axis for axis in AXES if axis != rows], format_func=AXIS_LABELS.get, key=f"{key}_columns")
+        fixed = {}
+        for axis in AXES:
+            if axis not in (rows, columns):
+                options = [round(float(value), 4) for value in cube.axes[axis]]
+                fixed[axis] = st.select_slider(AXIS_LABELS[axis], options, value=options[-1], key=f"{key}_{axis}")
+        pinned = ", ".join(f"{AXIS_LABELS[axis]} {value}" for axis, value in fixed.items())
+        st.pyplot(cube_heatmap(cube, rows, columns, f"{cube.name} Profits ({pinned})", **fixed))
+
+def display_greeks(strategy, S, T, r, sigma):
+    for greek, value in strategy_greeks(strategy, S, T, r, sigma).items():
         st.markdown(f"**{greek}:** {value:.4f}")
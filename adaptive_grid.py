@@ -0,0 +1,204 @@
+# adaptive_grid.py
+# Adaptive resolution for the heatmaps. A uniform 10 x 10 grid is too coarse to show the
+# kinks of a payoff, and a uniform fine grid spends almost all of its evaluations on
+# regions where P&L is close to a plane. Instead the domain starts as a coarse grid of
+# cells which are split into quarters (a quadtree) wherever the P&L bends or changes
+# sign - in practice along the strikes and the breakeven curves - until an evaluation
+# budget is spent. Every evaluated point is then resampled piecewise-linearly onto a
+# regular display grid.
+#
+# Points live on a virtual integer lattice of coarse * 2**max_depth cells per axis, so
+# corners shared between neighbouring cells are evaluated only once. The function being
+# refined takes two equal-length 1-D arrays (x, y) and is called once per refinement
+# round with every new point, so each round is a single vectorized pricing call.
+#
+# A PDE solve prices a whole spot axis at once (see finite_difference.py), so scattered
+# points cost one solve per distinct y. With whole_rows, the first time a y row is needed
+# every x of the lattice on it is priced in that one call and kept, and later rounds
+# touching the row only read it; each row is solved once for the whole refinement.
+#
+# Refining only pays when each evaluation is expensive. A closed-form price is cheap enough
+# that pricing every pixel of the display grid directly (DenseGrid) is both faster and exact.
+import timeit
+import numpy as np
+from scipy.interpolate import LinearNDInterpolator
+
+RESOLUTIONS = ("standard", "adaptive")
+
+class AdaptiveGrid:
+    __slots__ = ("function", "x_range", "y_range", "scale", "keys", "values", "leaves", "scores", "rows", "solved")
+
+    def __init__(self, function, x_range, y_range, coarse=8, max_depth=6, whole_rows=False):
+        self.function = function
+        self.x_range = (float(x_range[0]), float(x_range[1]))
+        self.y_range = (float(y_range[0]), float(y_range[1]))
+        self.scale = coarse * 2 ** max_depth
+        self.keys = np.empty(0, dtype=np.int64)
+        self.values = np.empty(0)
+        # Whole-row mode: values of every lattice point of the rows solved so far, indexed [j, i]
+        self.rows = np.empty((self.scale + 1, self.scale + 1)) if whole_rows else None
+        self.solved = np.zeros(self.scale + 1, dtype=bool)
+
+        # Leaves are rows of (i0, i1, j0, j1) on the lattice, x along i and y along j
+        step = 2 ** max_depth
+        i0, j0 = np.meshgrid(np.arange(coarse) * step, np.arange(coarse) * step, indexing="ij")
+        i0, j0 = i0.ravel(), j0.ravel()
+        self.leaves = np.column_stack((i0, i0 + step, j0, j0 + step))
+        self.scores = self.score(self.leaves)
+
+    @property
+    def evaluations(self):
+        return self.keys.size
+
+    def coordinates(self, i, j):
+        (x_min, x_max), (y_min, y_max) = self.x_range, self.y_range
+        return x_min + (x_max - x_min) * i / self.scale, y_min + (y_max - y_min) * j / self.scale
+
+    @property
+    def description(self):
+        return f"adaptive, {self.evaluations:,} evaluations"
+
+    # Values at lattice points (i, j), evaluating only the points not seen before. The new
+    # keys are merged into the sorted store in place of a full re-sort.
+    def evaluate(self, i, j):
+        keys = np.asarray(i, dtype=np.int64) * (self.scale + 1) + np.asarray(j, dtype=np.int64)
+        unique = np.unique(keys)
+        positions = np.searchsorted(self.keys, unique)
+        seen = self.keys[np.minimum(positions, self.keys.size - 1)] == unique if self.keys.size else np.zeros(unique.size, dtype=bool)
+        new, positions = unique[~seen], positions[~seen]
+        if new.size:
+            i_new, j_new = new // (self.scale + 1), new % (self.scale + 1)
+            if self.rows is None:
+                values = np.asarray(self.function(*self.coordinates(i_new, j_new)), dtype=float)
+            else:
+                values = self.row_values(i_new, j_new)
+            self.keys, self.values = np.insert(self.keys, positions, new), np.insert(self.values, positions, values)
+        return self.values[np.searchsorted(self.keys, keys)]
+
+    # Whole-row mode: every y row not solved yet is priced at all x of the lattice in one
+    # call, then the requested points are read from the stored rows
+    def row_values(self, i, j):
+        missing = np.unique(j[~self.solved[j]])
+        if missing.size:
+            x, y = self.coordinates(np.arange(self.scale + 1), missing)
+            self.rows[missing] = self.function(x[np.newaxis, :], y[:, np.newaxis])
+            self.solved[missing] = True
+        return self.rows[j, i]
+
+    # Refinement priority of each leaf: the largest gap between the P&L at the centre and edge
+    # midpoints and the bilinear estimate from the corners (curvature, or a kink crossing the
+    # cell), plus the cell's value span when the P&L changes sign inside it (a breakeven
+    # crossing the cell). Weighted by cell area, so it tracks the error the leaf contributes
+    # to the picture rather than sending the whole budget into the sharpest kink. All nine
+    # points of every leaf (corners, centre, edge midpoints) go to one evaluate call.
+    def score(self, leaves):
+        i0, i1, j0, j1 = leaves.T
+        im, jm = (i0 + i1) // 2, (j0 + j1) // 2
+        values = self.evaluate(np.concatenate((i0, i1, i0, i1, im, im, im, i0, i1)),
+                               np.concatenate((j0, j0, j1, j1, jm, j0, j1, jm, jm))).reshape(9, -1)
+        c00, c10, c01, c11 = values[:4]
+        samples = tuple(values[4:])
+        estimates = ((c00 + c10 + c01 + c11) / 4, (c00 + c10) / 2, (c01 + c11) / 2, (c00 + c01) / 2, (c10 + c11) / 2)
+        error = np.max([np.abs(sample - estimate) for sample, estimate in zip(samples, estimates)], axis=0)
+        points = np.vstack((c00, c10, c01, c11) + samples)
+        crosses = (points.min(axis=0) < 0) & (points.max(axis=0) > 0)
+        width = (i1 - i0) / self.scale
+        return width * (error + np.where(crosses, points.max(axis=0) - points.min(axis=0), 0.0))
+
+    # Split the highest-scoring leaves into quarters, at most half of the candidates per round,
+    # until the evaluation budget is spent or every leaf is within tolerance (relative to the
+    # value range seen so far) or at the finest level
+    def refine(self, budget=2000, tolerance=1e-3):
+        while True:
+            threshold = tolerance * max(np.ptp(self.values), np.finfo(float).tiny)
+            candidates = np.flatnonzero((self.leaves[:, 1] - self.leaves[:, 0] > 1) & (self.scores > threshold))
+            # Scoring the four children of a split costs at most 16 new points
+            count = min(max(candidates.size // 2, 1), (budget - self.evaluations) // 16)
+            if candidates.size == 0 or count <= 0:
+                return self
+            split = candidates[np.argsort(self.scores[candidates])[::-1][:count]]
+
+            i0, i1, j0, j1 = self.leaves[split].T
+            im, jm = (i0 + i1) // 2, (j0 + j1) // 2
+            children = np.concatenate([np.column_stack(bounds) for bounds in
+                                       ((i0, im, j0, jm), (im, i1, j0, jm), (i0, im, jm, j1), (im, i1, jm, j1))])
+            keep = np.ones(len(self.leaves), dtype=bool)
+            keep[split] = False
+            self.leaves = np.concatenate((self.leaves[keep], children))
+            self.scores = np.concatenate((self.scores[keep], self.score(children)))
+
+    # Piecewise-linear resampling onto a (rows, columns) display grid, rows along y and columns
+    # along x, over a Delaunay triangulation of every evaluated point (centres and edge
+    # midpoints included). Returns (grid, x coordinates, y coordinates).
+    def resample(self, columns=200, rows=200):
+        i, j = self.keys // (self.scale + 1), self.keys % (self.scale + 1)
+        surface = LinearNDInterpolator(np.column_stack((i, j)), self.values)
+        u, v = np.meshgrid(np.linspace(0, self.scale, columns), np.linspace(0, self.scale, rows))
+        return surface(u, v), np.linspace(*self.x_range, columns), np.linspace(*self.y_range, rows)
+
+def adaptive_grid(function, x_range, y_range, budget=2000, tolerance=1e-3, coarse=8, max_depth=6, whole_rows=False):
+    return AdaptiveGrid(function, x_range, y_range, coarse, max_depth, whole_rows).refine(budget, tolerance)
+
+# The display grid priced point by point, with function broadcasting x along columns and y
+# along rows. Stands in for an AdaptiveGrid when the pricing is closed form.
+class DenseGrid:
+    __slots__ = ("values", "x", "y")
+
+    def __init__(self, function, x_range, y_range, columns=200, rows=200):
+        self.x = np.linspace(*x_range, columns)
+        self.y = np.linspace(*y_range, rows)
+        self.values = np.asarray(function(self.x[np.newaxis, :], self.y[:, np.newaxis]), dtype=float)
+
+    @property
+    def evaluations(self):
+        return self.values.size
+
+    @property
+    def description(self):
+        return f"exact, {self.y.size} x {self.x.size}"
+
+    # Already on the display grid; the shape is fixed at construction
+    def resample(self):
+        return self.values, self.x, self.y
+
+# Resampling error of the adaptive grid against uniform grids, on a (rows, columns) display grid
+# compared with the exact values. Returns {name: (evaluations, seconds, max error, mean error)}
+# for "adaptive", "uniform" (same number of evaluations), "uniform_fine" (as many points per
+# axis as the finest adaptive level) and "dense" (the display grid priced directly).
+def benchmark(function, x_range, y_range, budget=2000, columns=200, rows=200, coarse=8, max_depth=6, repeat=3):
+    x = np.linspace(*x_range, columns)
+    y = np.linspace(*y_range, rows)
+    exact = function(*np.meshgrid(x, y))
+
+    def adaptive():
+        grid = adaptive_grid(function, x_range, y_range, budget, coarse=coarse, max_depth=max_depth)
+        return grid.evaluations, grid.resample(columns, rows)[0]
+
+    # Bilinear resampling of a uniform side x side grid onto the display grid, one axis at a time
+    def uniform(side):
+        x_grid, y_grid = np.linspace(*x_range, side), np.linspace(*y_range, side)
+        values = function(*np.meshgrid(x_grid, y_grid))
+        along_x = np.array([np.interp(x, x_grid, row) for row in values])
+        return side * side, np.array([np.interp(y, y_grid, column) for column in along_x.T]).T
+
+    evaluations = adaptive()[0]
+    runs = {"adaptive": adaptive,
+            "uniform": lambda: uniform(int(np.sqrt(evaluations))),
+            "uniform_fine": lambda: uniform(coarse * 2 ** max_depth + 1),
+            "dense": lambda: (columns * rows, DenseGrid(function, x_range, y_range, columns, rows).values)}
+    results = {}
+    for name, run in runs.items():
+        seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+        used, grid = run()
+        error = np.abs(grid - exact)
+        results[name] = (used, seconds, float(np.max(error)), float(np.mean(error)))
+    return results
+
+if __name__ == "__main__":
+    from strategies import Leg, Strategy, scenario_profit
+    butterfly = Strategy("Long Call Butterfly", [Leg("call", 90.0), Leg("call", 100.0, 2, "short"), Leg("call", 110.0)])
+    for valuation in ("hold_to_expiry", "mark_to_market"):
+        profit = lambda spot, vol: scenario_profit(butterfly, spot, vol, 0.1, 0.03, valuation)
+        print(valuation)
+        for name, (evaluations, seconds, max_error, mean_error) in benchmark(profit, (70.0, 130.0), (0.05, 0.6)).items():
+            print(f"{name:>14}: {evaluations:>7,} evaluations {seconds * 1e3:7.1f} ms  max error {max_error:.4f}  mean error {mean_error:.5f}")
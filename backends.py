@@ -0,0 +1,246 @@
+# backends.py
+# Interchangeable compute backends for the core pricing and Greek kernels:
+#   numpy   - the reference kernels in black_scholes.py (always available)
+#   numexpr - multithreaded evaluation of the arithmetic, scipy's ndtr for N(x)
+#   numba   - JIT-compiled parallel loops over the broadcast inputs
+# Optional dependencies are imported defensively; a backend whose library is missing
+# (or whose kernels fail to compile) is simply left out. BackendSelector benchmarks the
+# available backends on representative array sizes once per process and dispatches each
+# call to the fastest backend for its size class. PRICING_BACKEND forces one backend.
+# main.py installs get_selector() into black_scholes at startup, so every array call to
+# call_price, put_price and all_greeks is dispatched through it.
+import math
+import os
+import threading
+import timeit
+import numpy as np
+from scipy.special import ndtr
+import black_scholes
+from black_scholes import Greeks
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+try:
+    import numba
+    # Streamlit runs scripts on worker threads, and the TBB layer started off the main
+    # thread keeps the process from exiting; the built-in workqueue layer does not, but it
+    # must not be entered by two threads at once, so NumbaBackend launches under a lock.
+    numba.config.THREADING_LAYER = "workqueue"
+except ImportError:
+    numba = None
+
+GREEK_FIELDS = Greeks._fields
+
+def broadcast_flat(S, K, T, r, sigma):
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma)))
+    # Broadcast views are read-only and strided; the compiled loops want flat contiguous
+    # buffers, so each input is copied explicitly
+    return arrays[0].shape, [np.array(a, order="C").ravel() for a in arrays]
+
+class NumPyBackend:
+    name = "numpy"
+
+    def call_price(self, S, K, T, r, sigma):
+        return black_scholes.numpy_call_price(S, K, T, r, sigma)
+
+    def put_price(self, S, K, T, r, sigma):
+        return black_scholes.numpy_put_price(S, K, T, r, sigma)
+
+    def all_greeks(self, S, K, T, r, sigma):
+        return black_scholes.numpy_all_greeks(S, K, T, r, sigma)
+
+class NumExprBackend:
+    name = "numexpr"
+
+    def __init__(self):
+        if numexpr is None:
+            raise ImportError("numexpr is not installed")
+
+    def intermediates(self, S, K, T, r, sigma):
+        S, K, T, r, sigma = (np.asarray(x, dtype=float) for x in (S, K, T, r, sigma))
+        d1 = numexpr.evaluate("(log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt(T))")
+        d2 = numexpr.evaluate("d1 - sigma * sqrt(T)")
+        return S, K, T, r, sigma, d1, d2
+
+    def call_price(self, S, K, T, r, sigma):
+        S, K, T, r, sigma, d1, d2 = self.intermediates(S, K, T, r, sigma)
+        N1, N2 = ndtr(d1), ndtr(d2)
+        return numexpr.evaluate("S * N1 - K * exp(-r * T) * N2")
+
+    def put_price(self, S, K, T, r, sigma):
+        S, K, T, r, sigma, d1, d2 = self.intermediates(S, K, T, r, sigma)
+        M1, M2 = ndtr(-d1), ndtr(-d2)
+        return numexpr.evaluate("K * exp(-r * T) * M2 - S * M1")
+
+    def all_greeks(self, S, K, T, r, sigma):
+        S, K, T, r, sigma, d1, d2 = self.intermediates(S, K, T, r, sigma)
+        N1, N2, M1, M2 = ndtr(d1), ndtr(d2), ndtr(-d1), ndtr(-d2)
+        pdf = numexpr.evaluate("exp(-0.5 * d1 * d1) * 0.3989422804014327")
+        DK = numexpr.evaluate("K * exp(-r * T)")
+        decay = numexpr.evaluate("-S * pdf * sigma / (2 * sqrt(T))")
+        return Greeks(
+            call_price=numexpr.evaluate("S * N1 - DK * N2"),
+            put_price=numexpr.evaluate("DK * M2 - S * M1"),
+            call_delta=N1,
+            put_delta=N1 - 1,
+            gamma=numexpr.evaluate("pdf / (S * sigma * sqrt(T))"),
+            vega=numexpr.evaluate("S * pdf * sqrt(T) * 0.01"),
+            call_rho=numexpr.evaluate("DK * T * N2 * 0.01"),
+            put_rho=numexpr.evaluate("-DK * T * M2 * 0.01"),
+            call_theta=numexpr.evaluate("(decay - r * DK * N2) * 0.01"),
+            put_theta=numexpr.evaluate("(decay + r * DK * M2) * 0.01")
+        )
+
+if numba is not None:
+    SQRT_HALF = math.sqrt(0.5)
+    INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+    @numba.njit(cache=True, error_model="numpy")
+    def numba_norm_cdf(x):
+        # erfc keeps full relative accuracy in the lower tail, like scipy's ndtr
+        return 0.5 * math.erfc(-x * SQRT_HALF)
+
+    @numba.njit(parallel=True, cache=True, error_model="numpy")
+    def numba_prices(S, K, T, r, sigma, call_out, put_out):
+        for i in numba.prange(S.shape[0]):
+            vol_sqrt_T = sigma[i] * math.sqrt(T[i])
+            d1 = (math.log(S[i] / K[i]) + (r[i] + 0.5 * sigma[i] ** 2) * T[i]) / vol_sqrt_T
+            d2 = d1 - vol_sqrt_T
+            discounted_K = K[i] * math.exp(-r[i] * T[i])
+            call_out[i] = S[i] * numba_norm_cdf(d1) - discounted_K * numba_norm_cdf(d2)
+            put_out[i] = discounted_K * numba_norm_cdf(-d2) - S[i] * numba_norm_cdf(-d1)
+
+    @numba.njit(parallel=True, cache=True, error_model="numpy")
+    def numba_greeks(S, K, T, r, sigma, out):
+        for i in numba.prange(S.shape[0]):
+            sqrt_T = math.sqrt(T[i])
+            d1 = (math.log(S[i] / K[i]) + (r[i] + 0.5 * sigma[i] ** 2) * T[i]) / (sigma[i] * sqrt_T)
+            d2 = d1 - sigma[i] * sqrt_T
+            pdf = INV_SQRT_2PI * math.exp(-0.5 * d1 * d1)
+            N1, N2 = numba_norm_cdf(d1), numba_norm_cdf(d2)
+            M1, M2 = numba_norm_cdf(-d1), numba_norm_cdf(-d2)
+            discounted_K = K[i] * math.exp(-r[i] * T[i])
+            decay = -S[i] * pdf * sigma[i] / (2 * sqrt_T)
+            out[0, i] = S[i] * N1 - discounted_K * N2
+            out[1, i] = discounted_K * M2 - S[i] * M1
+            out[2, i] = N1
+            out[3, i] = N1 - 1
+            out[4, i] = pdf / (S[i] * sigma[i] * sqrt_T)
+            out[5, i] = S[i] * pdf * sqrt_T * 0.01
+            out[6, i] = discounted_K * T[i] * N2 * 0.01
+            out[7, i] = -discounted_K * T[i] * M2 * 0.01
+            out[8, i] = (decay - r[i] * discounted_K * N2) * 0.01
+            out[9, i] = (decay + r[i] * discounted_K * M2) * 0.01
+
+class NumbaBackend:
+    name = "numba"
+    launch_lock = threading.Lock()
+
+    def __init__(self):
+        if numba is None:
+            raise ImportError("numba is not installed")
+
+    def prices(self, S, K, T, r, sigma):
+        shape, flat = broadcast_flat(S, K, T, r, sigma)
+        call_out = np.empty(flat[0].size)
+        put_out = np.empty(flat[0].size)
+        with self.launch_lock:
+            numba_prices(*flat, call_out, put_out)
+        return call_out.reshape(shape), put_out.reshape(shape)
+
+    def call_price(self, S, K, T, r, sigma):
+        return self.prices(S, K, T, r, sigma)[0]
+
+    def put_price(self, S, K, T, r, sigma):
+        return self.prices(S, K, T, r, sigma)[1]
+
+    def all_greeks(self, S, K, T, r, sigma):
+        shape, flat = broadcast_flat(S, K, T, r, sigma)
+        out = np.empty((len(GREEK_FIELDS), flat[0].size))
+        with self.launch_lock:
+            numba_greeks(*flat, out)
+        return Greeks(*(row.reshape(shape) for row in out))
+
+BACKEND_TYPES = (NumPyBackend, NumExprBackend, NumbaBackend)
+
+def available_backends():
+    backends = []
+    for backend_type in BACKEND_TYPES:
+        try:
+            backend = backend_type()
+            # Run once on a tiny input so a backend that cannot compile or evaluate is dropped here
+            backend.all_greeks(np.array([100.0]), 100.0, 1.0, 0.05, 0.2)
+        except Exception:
+            continue
+        backends.append(backend)
+    return backends
+
+# Upper bounds of the size classes; anything larger uses the last class
+SIZE_CLASSES = (1_000, 100_000, 1_000_000)
+
+class BackendSelector:
+    def __init__(self, backends=None):
+        self.backends = {backend.name: backend for backend in (backends or available_backends())}
+        self.choice = {size: "numpy" if "numpy" in self.backends else next(iter(self.backends)) for size in SIZE_CLASSES}
+        self.timings = {}
+
+    def autotune(self, sizes=SIZE_CLASSES, repeat=3):
+        rng = np.random.default_rng(0)
+        for size in sizes:
+            inputs = (rng.uniform(50, 150, size), 100.0, rng.uniform(0.05, 2.0, size), 0.03, rng.uniform(0.05, 0.8, size))
+            number = max(1, 100_000 // size)
+            self.timings[size] = {
+                name: min(timeit.repeat(lambda: backend.all_greeks(*inputs), number=number, repeat=repeat)) / number
+                for name, backend in self.backends.items()
+            }
+            self.choice[size] = min(self.timings[size], key=self.timings[size].get)
+        return self.timings
+
+    def force(self, name):
+        if name not in self.backends:
+            raise ValueError(f"Backend {name} is not available; choose from {sorted(self.backends)}")
+        self.choice = {size: name for size in SIZE_CLASSES}
+
+    def backend_for(self, size):
+        for upper in SIZE_CLASSES:
+            if size <= upper:
+                return self.backends[self.choice[upper]]
+        return self.backends[self.choice[SIZE_CLASSES[-1]]]
+
+    def dispatch(self, S, K, T, r, sigma):
+        return self.backend_for(np.broadcast(*(np.asarray(x) for x in (S, K, T, r, sigma))).size)
+
+    def call_price(self, S, K, T, r, sigma):
+        return self.dispatch(S, K, T, r, sigma).call_price(S, K, T, r, sigma)
+
+    def put_price(self, S, K, T, r, sigma):
+        return self.dispatch(S, K, T, r, sigma).put_price(S, K, T, r, sigma)
+
+    def all_greeks(self, S, K, T, r, sigma):
+        return self.dispatch(S, K, T, r, sigma).all_greeks(S, K, T, r, sigma)
+
+default_selector = None
+selector_lock = threading.Lock()
+
+# Process-wide selector, tuned on first use (or pinned with PRICING_BACKEND=numpy|numexpr|numba)
+def get_selector():
+    global default_selector
+    with selector_lock:
+        if default_selector is None:
+            selector = BackendSelector()
+            forced = os.environ.get("PRICING_BACKEND", "auto")
+            if forced == "auto":
+                selector.autotune()
+            else:
+                selector.force(forced)
+            default_selector = selector
+        return default_selector
+
+if __name__ == "__main__":
+    selector = BackendSelector()
+    for size, timings in selector.autotune().items():
+        ranked = ", ".join(f"{name} {seconds * 1e3:.3f} ms" for name, seconds in sorted(timings.items(), key=lambda item: item[1]))
+        print(f"n={size:>9,}: {ranked} -> {selector.choice[size]}")
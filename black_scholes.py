@@ -1,5 +1,134 @@
+import os
+from collections import namedtuple
 import numpy as np
-from scipy.stats import norm
+from fast_norm import norm_cdf, norm_pdf
+from pricing_cache import PricingCache
+
+# Scalar pricing calls are memoized process-wide (see pricing_cache.py); array calls bypass it.
+# Capacity comes from PRICING_CACHE_SIZE; inspect it with pricing_cache.stats().
+pricing_cache = PricingCache(capacity=int(os.environ.get("PRICING_CACHE_SIZE", 4096)))
+
+# Working precision of the vectorized kernels. "float32" halves memory and bandwidth on
+# large grids at roughly 1e-6 relative accuracy; the budget is documented in precision.py.
+PRECISIONS = {"float64": np.float64, "float32": np.float32}
+
+def as_precision(x, precision="float64"):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    return np.asarray(x, dtype=PRECISIONS[precision])
+
+# Vectorized pricing kernels. Every argument may be a scalar or an array; inputs
+# broadcast against each other so a whole spot x vol grid is priced in one call,
+# e.g. call_price(spot_range[np.newaxis, :], K, T, r, vol_range[:, np.newaxis]).
+def d1_d2(S, K, T, r, sigma, precision="float64"):
+    S, K, T, r, sigma = (as_precision(x, precision) for x in (S, K, T, r, sigma))
+    vol_sqrt_T = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol_sqrt_T
+    return d1, d1 - vol_sqrt_T
+
+def numpy_call_price(S, K, T, r, sigma, precision="float64"):
+    S, K, T, r, sigma = (as_precision(x, precision) for x in (S, K, T, r, sigma))
+    d1, d2 = d1_d2(S, K, T, r, sigma, precision)
+    return S * norm_cdf(d1) - K * np.exp(-r * T) * norm_cdf(d2)
+
+def numpy_put_price(S, K, T, r, sigma, precision="float64"):
+    S, K, T, r, sigma = (as_precision(x, precision) for x in (S, K, T, r, sigma))
+    d1, d2 = d1_d2(S, K, T, r, sigma, precision)
+    return K * np.exp(-r * T) * norm_cdf(-d2) - S * norm_cdf(-d1)
+
+# The numpy_* functions are the reference kernels. Once a backend selector is installed
+# (main.py installs the auto-tuned one from backends.py at startup), float64 array calls go
+# to the backend it picked for their size class; scalar and float32 calls stay on NumPy.
+backend_selector = None
+
+def use_backend_selector(selector):
+    global backend_selector
+    backend_selector = selector
+
+def selected_backend(S, K, T, r, sigma, precision):
+    if backend_selector is None or precision != "float64" or all(np.ndim(x) == 0 for x in (S, K, T, r, sigma)):
+        return None
+    return backend_selector.dispatch(S, K, T, r, sigma)
+
+@pricing_cache.memoize
+def call_price(S, K, T, r, sigma, precision="float64"):
+    backend = selected_backend(S, K, T, r, sigma, precision)
+    if backend is None:
+        return numpy_call_price(S, K, T, r, sigma, precision)
+    return backend.call_price(S, K, T, r, sigma)
+
+@pricing_cache.memoize
+def put_price(S, K, T, r, sigma, precision="float64"):
+    backend = selected_backend(S, K, T, r, sigma, precision)
+    if backend is None:
+        return numpy_put_price(S, K, T, r, sigma, precision)
+    return backend.put_price(S, K, T, r, sigma)
+
+def option_price(S, K, T, r, sigma, option_type="call", precision="float64"):
+    if option_type == "call":
+        return call_price(S, K, T, r, sigma, precision)
+    elif option_type == "put":
+        return put_price(S, K, T, r, sigma, precision)
+    raise ValueError(f"Unknown option type: {option_type}")
+
+# Mark-to-market profit of a long option bought at purchase_price, floored at the premium paid
+def option_profit(S, K, T, r, sigma, purchase_price, option_type="call", precision="float64"):
+    price = option_price(S, K, T, r, sigma, option_type, precision)
+    purchase_price = as_precision(purchase_price, precision)
+    return np.maximum(price - purchase_price, -purchase_price)
+
+# Struct-of-arrays holding prices and every Greek for calls and puts together.
+# Scaling conventions match the BlackScholes methods (vega, rho and theta per 1%).
+class Greeks(namedtuple("Greeks", [
+        "call_price", "put_price",
+        "call_delta", "put_delta",
+        "gamma", "vega",
+        "call_rho", "put_rho",
+        "call_theta", "put_theta"])):
+    __slots__ = ()
+
+    def as_dict(self, option_type):
+        if option_type not in ("call", "put"):
+            raise ValueError(f"Unknown option type: {option_type}")
+        return {
+            "Delta": getattr(self, f"{option_type}_delta"),
+            "Gamma": self.gamma,
+            "Vega": self.vega,
+            "Rho": getattr(self, f"{option_type}_rho"),
+            "Theta": getattr(self, f"{option_type}_theta")
+        }
+
+# Single pass over the shared intermediates: d1, d2, the normal pdf/cdf terms and
+# the discount factor are each evaluated once and reused by every Greek.
+def numpy_all_greeks(S, K, T, r, sigma, precision="float64"):
+    S, K, T, r, sigma = (as_precision(x, precision) for x in (S, K, T, r, sigma))
+    d1, d2 = d1_d2(S, K, T, r, sigma, precision)
+    sqrt_T = np.sqrt(T)
+    pdf_d1 = norm_pdf(d1)
+    cdf_d1, cdf_d2 = norm_cdf(d1), norm_cdf(d2)
+    cdf_neg_d1, cdf_neg_d2 = norm_cdf(-d1), norm_cdf(-d2)
+    discounted_K = K * np.exp(-r * T)
+
+    decay = (-S * pdf_d1 * sigma) / (2 * sqrt_T)
+    return Greeks(
+        call_price=S * cdf_d1 - discounted_K * cdf_d2,
+        put_price=discounted_K * cdf_neg_d2 - S * cdf_neg_d1,
+        call_delta=cdf_d1,
+        put_delta=cdf_d1 - 1,
+        gamma=pdf_d1 / (S * sigma * sqrt_T),
+        vega=S * pdf_d1 * sqrt_T * 0.01,
+        call_rho=discounted_K * T * cdf_d2 * 0.01,
+        put_rho=-discounted_K * T * cdf_neg_d2 * 0.01,
+        call_theta=(decay - r * discounted_K * cdf_d2) * 0.01,
+        put_theta=(decay + r * discounted_K * cdf_neg_d2) * 0.01
+    )
+
+@pricing_cache.memoize
+def all_greeks(S, K, T, r, sigma, precision="float64"):
+    backend = selected_backend(S, K, T, r, sigma, precision)
+    if backend is None:
+        return numpy_all_greeks(S, K, T, r, sigma, precision)
+    return backend.all_greeks(S, K, T, r, sigma)
 
 class BlackScholes:
     def __init__(self, S, K, T, r, sigma, purchase_price):
@@ -11,64 +140,55 @@ class BlackScholes:
         self.purchase_price = purchase_price
 
     def d1(self):
-        return (np.log(self.S / self.K) +
-                (self.r + 0.5 * self.sigma ** 2) * self.T) / (self.sigma * np.sqrt(self.T))
+        return d1_d2(self.S, self.K, self.T, self.r, self.sigma)[0]
 
     def d2(self):
-        return self.d1() - self.sigma * np.sqrt(self.T)
+        return d1_d2(self.S, self.K, self.T, self.r, self.sigma)[1]
 
     def call_option_price(self):
-        return (self.S * norm.cdf(self.d1()) -
-                self.K * np.exp(-self.r * self.T) * norm.cdf(self.d2()))
+        return call_price(self.S, self.K, self.T, self.r, self.sigma)
 
     def put_option_price(self):
-        return (self.K * np.exp(-self.r * self.T) * norm.cdf(-self.d2()) -
-                self.S * norm.cdf(-self.d1()))
+        return put_price(self.S, self.K, self.T, self.r, self.sigma)
 
     def calculate_prices(self):
         call_price = self.call_option_price()
         put_price = self.put_option_price()
         return call_price, put_price
 
+    # Profit at the given spot (scalar or array); the model itself is left unchanged
     def calculate_payoff(self, spot_price, option_type):
-        self.S = spot_price
-        call_price = self.call_option_price()
-        put_price = self.put_option_price()
-        
-        if option_type == "call":
-            return np.maximum(call_price - self.purchase_price, -self.purchase_price)
-        elif option_type == "put":
-            return np.maximum(put_price - self.purchase_price, -self.purchase_price)
-        
+        return option_profit(spot_price, self.K, self.T, self.r, self.sigma, self.purchase_price, option_type)
 
+    def greeks(self):
+        return all_greeks(self.S, self.K, self.T, self.r, self.sigma)
 
-        
 # Greek calculations
     def delta(self, option_type):
         if option_type == "call":
-            return norm.cdf(self.d1())
+            return norm_cdf(self.d1())
         elif option_type == "put":
-            return norm.cdf(self.d1()) - 1
+            return norm_cdf(self.d1()) - 1
 
     def gamma(self):
-        return norm.pdf(self.d1()) / (self.S * self.sigma * np.sqrt(self.T))
+        return norm_pdf(self.d1()) / (self.S * self.sigma * np.sqrt(self.T))
 
     def vega(self):
-        return (self.S * norm.pdf(self.d1()) * np.sqrt(self.T) * 0.01)
+        return (self.S * norm_pdf(self.d1()) * np.sqrt(self.T) * 0.01)
 
     def rho(self, option_type):
         if option_type == "call":
-            return (self.K * self.T * np.exp(-self.r * self.T) * norm.cdf(self.d2()) * 0.01)
+            return (self.K * self.T * np.exp(-self.r * self.T) * norm_cdf(self.d2()) * 0.01)
         elif option_type == "put":
-            return (-self.K * self.T * np.exp(-self.r * self.T) * norm.cdf(-self.d2()) * 0.01)
+            return (-self.K * self.T * np.exp(-self.r * self.T) * norm_cdf(-self.d2()) * 0.01)
 
     def theta(self, option_type):
-        term1 = (-self.S * norm.pdf(self.d1()) * self.sigma) / (2 * np.sqrt(self.T))
+        term1 = (-self.S * norm_pdf(self.d1()) * self.sigma) / (2 * np.sqrt(self.T))
         if option_type == "call":
-            term2 = self.r * self.K * np.exp(-self.r * self.T) * norm.cdf(self.d2())
+            term2 = self.r * self.K * np.exp(-self.r * self.T) * norm_cdf(self.d2())
             return (term1 - term2) * 0.01
         elif option_type == "put":
-            term2 = self.r * self.K * np.exp(-self.r * self.T) * norm.cdf(-self.d2())
+            term2 = self.r * self.K * np.exp(-self.r * self.T) * norm_cdf(-self.d2())
             return (term1 + term2) * 0.01
     
         # Hedges
@@ -0,0 +1,135 @@
+# bs_tables.py
+# Optional tabulated Black-Scholes pricer. Prices and Greeks depend on (S, K, T, r, sigma)
+# only through log-moneyness k = ln(K / F), with F = S e^(rT), and total volatility
+# v = sigma * sqrt(T):
+#     C / S = N(d1) - e^k N(d2),   d1 = -k / v + v / 2,   d2 = d1 - v
+# The normalized call price, N(d1) and n(d1) are tabulated once on a (k, v) grid and
+# interpolated with bicubic splines; every Greek is rebuilt from those three tables.
+# Queries outside the table domain fall back to the exact all_greeks kernel.
+#
+# Error bound: when a table is built, each spline is checked against the exact formula
+# on all cell midpoints (where interpolation error peaks) and the worst absolute error
+# is stored in error_bounds. The Greeks rebuilt from the tables get bounds of their own:
+# "gamma" is the error of S * gamma = n(d1) / v and "itm_leg" the error of
+# K e^(-rT) N(d2) / S = N(d1) - C / S, both measured on the same midpoints. Scaled back:
+#     price   error_bounds["price"] * S
+#     delta   error_bounds["delta"]
+#     gamma   error_bounds["gamma"] / S
+#     vega    error_bounds["density"] * S * sqrt(T) / 100
+#     rho     error_bounds["itm_leg"] * S * T / 100
+#     theta   (error_bounds["density"] * S * v / (2T) + error_bounds["itm_leg"] * r * S) / 100
+# The default grid (401 x 301, v spaced geometrically) gives about 5.1e-9 (price),
+# 1.4e-7 (delta), 3.1e-7 (density), 6.1e-6 (gamma) and 1.4e-7 (itm_leg).
+import os
+import numpy as np
+from scipy.interpolate import RectBivariateSpline
+from black_scholes import Greeks, all_greeks
+from fast_norm import norm_cdf, norm_pdf
+
+TABLE_NAMES = ("price", "delta", "density")
+BOUND_NAMES = TABLE_NAMES + ("gamma", "itm_leg")
+
+def normalized_values(k, v):
+    d1 = -k / v + v / 2
+    d2 = d1 - v
+    return {
+        "price": norm_cdf(d1) - np.exp(k) * norm_cdf(d2),
+        "delta": norm_cdf(d1),
+        "density": norm_pdf(d1)
+    }
+
+class TabulatedPricer:
+    def __init__(self, k_axis, v_axis, tables, error_bounds):
+        self.k_axis = np.asarray(k_axis, dtype=float)
+        self.v_axis = np.asarray(v_axis, dtype=float)
+        self.tables = {name: np.asarray(tables[name], dtype=float) for name in TABLE_NAMES}
+        self.error_bounds = dict(error_bounds)
+        self.splines = {name: RectBivariateSpline(self.k_axis, self.v_axis, self.tables[name]) for name in TABLE_NAMES}
+
+    @classmethod
+    def build(cls, k_min=-1.0, k_max=1.0, v_min=0.05, v_max=1.5, num_k=401, num_v=301):
+        k_axis = np.linspace(k_min, k_max, num_k)
+        # Prices curve hardest at small total volatility, so the v nodes are packed there
+        v_axis = np.geomspace(v_min, v_max, num_v)
+        tables = normalized_values(k_axis[:, np.newaxis], v_axis[np.newaxis, :])
+        pricer = cls(k_axis, v_axis, tables, {})
+
+        k_mid = (k_axis[1:] + k_axis[:-1]) / 2
+        v_mid = (v_axis[1:] + v_axis[:-1]) / 2
+        exact = normalized_values(k_mid[:, np.newaxis], v_mid[np.newaxis, :])
+        errors = {name: pricer.splines[name](k_mid, v_mid) - exact[name] for name in TABLE_NAMES}
+        errors["gamma"] = errors["density"] / v_mid[np.newaxis, :]
+        errors["itm_leg"] = errors["delta"] - errors["price"]
+        pricer.error_bounds = {name: float(np.max(np.abs(errors[name]))) for name in BOUND_NAMES}
+        return pricer
+
+    # Tables are plain arrays, so a saved file reloads without re-evaluating the formula
+    def save(self, path):
+        np.savez(path, k_axis=self.k_axis, v_axis=self.v_axis,
+                 error_bounds=np.array([self.error_bounds[name] for name in BOUND_NAMES]),
+                 **self.tables)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            tables = {name: data[name] for name in TABLE_NAMES}
+            error_bounds = dict(zip(BOUND_NAMES, data["error_bounds"].tolist()))
+            return cls(data["k_axis"], data["v_axis"], tables, error_bounds)
+
+    def in_domain(self, k, v):
+        return (k >= self.k_axis[0]) & (k <= self.k_axis[-1]) & (v >= self.v_axis[0]) & (v <= self.v_axis[-1])
+
+    def greeks(self, S, K, T, r, sigma):
+        S, K, T, r, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma)))
+        sqrt_T = np.sqrt(T)
+        v = sigma * sqrt_T
+        k = np.log(K / S) - r * T
+        inside = self.in_domain(k, v)
+
+        k_in, v_in = k[inside], v[inside]
+        price, delta, density = (self.splines[name](k_in, v_in, grid=False) for name in TABLE_NAMES)
+        S_in, T_in, r_in, sqrt_T_in = S[inside], T[inside], r[inside], sqrt_T[inside]
+
+        discounted_K = S_in * np.exp(k_in)
+        itm_leg = S_in * (delta - price)  # K e^(-rT) N(d2)
+        decay = -S_in * density * sigma[inside] / (2 * sqrt_T_in)
+        tabulated = Greeks(
+            call_price=S_in * price,
+            put_price=S_in * price - S_in + discounted_K,
+            call_delta=delta,
+            put_delta=delta - 1,
+            gamma=density / (S_in * v_in),
+            vega=S_in * density * sqrt_T_in * 0.01,
+            call_rho=T_in * itm_leg * 0.01,
+            put_rho=-T_in * (discounted_K - itm_leg) * 0.01,
+            call_theta=(decay - r_in * itm_leg) * 0.01,
+            put_theta=(decay + r_in * (discounted_K - itm_leg)) * 0.01
+        )
+        if inside.all():
+            return Greeks(*(field.reshape(S.shape) for field in tabulated))
+
+        outside = ~inside
+        exact = all_greeks(S[outside], K[outside], T[outside], r[outside], sigma[outside])
+        fields = []
+        for table_field, exact_field in zip(tabulated, exact):
+            field = np.empty(S.shape)
+            field[inside] = table_field
+            field[outside] = exact_field
+            fields.append(field)
+        return Greeks(*fields)
+
+    def option_price(self, S, K, T, r, sigma, option_type="call"):
+        if option_type not in ("call", "put"):
+            raise ValueError(f"Unknown option type: {option_type}")
+        return getattr(self.greeks(S, K, T, r, sigma), f"{option_type}_price")
+
+    def greeks_for(self, bs_model):
+        return self.greeks(bs_model.S, bs_model.K, bs_model.T, bs_model.r, bs_model.sigma)
+
+# Build the table once per deployment: reuse the file at path if it exists, otherwise build and save it
+def load_or_build(path, **grid):
+    if os.path.exists(path):
+        return TabulatedPricer.load(path)
+    pricer = TabulatedPricer.build(**grid)
+    pricer.save(path)
+    return pricer
@@ -0,0 +1,85 @@
+# contracts.py
+# Immutable option contract records and an array-backed book of many contracts.
+# OptionContract is a slotted namedtuple: no per-instance __dict__, hashable, and safe
+# to share between Streamlit sessions or use as a cache key. ContractBook stores a whole
+# book column-wise in read-only NumPy arrays (57 bytes per contract). Pricing is
+# done by the pure functions below; nothing here is ever modified in place.
+from collections import namedtuple
+import numpy as np
+from black_scholes import all_greeks, option_price, option_profit
+
+class OptionContract(namedtuple("OptionContract",
+        ["S", "K", "T", "r", "sigma", "option_type", "purchase_price", "quantity"],
+        defaults=("call", 0.0, 1.0))):
+    __slots__ = ()
+
+    # Bump one or more inputs, e.g. contract.replace(S=105.0); returns a new record
+    def replace(self, **changes):
+        return self._replace(**changes)
+
+def contract_price(contract):
+    return option_price(contract.S, contract.K, contract.T, contract.r, contract.sigma, contract.option_type)
+
+# Greeks of one contract (per unit, not scaled by quantity), keyed like Greeks.as_dict
+def contract_greeks(contract):
+    return all_greeks(contract.S, contract.K, contract.T, contract.r, contract.sigma).as_dict(contract.option_type)
+
+# Profit of the contract at the given spot (scalar or array), per unit
+def contract_profit(contract, spot):
+    return option_profit(spot, contract.K, contract.T, contract.r, contract.sigma, contract.purchase_price, contract.option_type)
+
+class ContractBook:
+    __slots__ = ("S", "K", "T", "r", "sigma", "is_call", "purchase_price", "quantity")
+
+    def __init__(self, S, K, T, r, sigma, is_call, purchase_price=0.0, quantity=1.0):
+        columns = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma, purchase_price, quantity)),
+                                      np.asarray(is_call, dtype=bool))
+        # Own the data and freeze it, so a book can be shared across threads without copying
+        columns = [np.array(column).ravel() for column in columns]
+        for column in columns:
+            column.setflags(write=False)
+        self.S, self.K, self.T, self.r, self.sigma, self.purchase_price, self.quantity, self.is_call = columns
+
+    @classmethod
+    def from_contracts(cls, contracts):
+        contracts = list(contracts)
+        if not contracts:
+            return cls([], [], [], [], [], [])
+        for contract in contracts:
+            if contract.option_type not in ("call", "put"):
+                raise ValueError(f"Unknown option type: {contract.option_type}")
+        S, K, T, r, sigma, option_type, purchase_price, quantity = zip(*contracts)
+        return cls(S, K, T, r, sigma, [kind == "call" for kind in option_type], purchase_price, quantity)
+
+    def __len__(self):
+        return self.S.size
+
+    def __getitem__(self, index):
+        return OptionContract(float(self.S[index]), float(self.K[index]), float(self.T[index]), float(self.r[index]),
+                              float(self.sigma[index]), "call" if self.is_call[index] else "put",
+                              float(self.purchase_price[index]), float(self.quantity[index]))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    # Same book with some columns replaced, e.g. book.replace(S=new_spot) for a spot shock
+    def replace(self, **changes):
+        columns = {name: changes.get(name, getattr(self, name)) for name in self.__slots__}
+        return ContractBook(**columns)
+
+# Per-contract price and Greeks of a book (per unit), each an array aligned with the book
+def book_greeks(book):
+    greeks = all_greeks(book.S, book.K, book.T, book.r, book.sigma)
+    is_call = book.is_call
+    return {
+        "Price": np.where(is_call, greeks.call_price, greeks.put_price),
+        "Delta": np.where(is_call, greeks.call_delta, greeks.put_delta),
+        "Gamma": greeks.gamma,
+        "Vega": greeks.vega,
+        "Rho": np.where(is_call, greeks.call_rho, greeks.put_rho),
+        "Theta": np.where(is_call, greeks.call_theta, greeks.put_theta)
+    }
+
+# Quantity-weighted totals of book_greeks over the whole book
+def book_totals(book):
+    return {name: float(np.dot(book.quantity, values)) for name, values in book_greeks(book).items()}
@@ -0,0 +1,59 @@
+# fast_norm.py
+# Low-overhead standard normal CDF/PDF for the pricing hot paths. scipy.stats.norm
+# routes every call through rv_continuous argument checking and loc/scale handling;
+# these call the underlying ufuncs directly and give the same values.
+import timeit
+import numpy as np
+from scipy.special import ndtr
+
+INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+def norm_cdf(x):
+    # ndtr is erfc-based in the lower tail, so it keeps full relative accuracy down to ~-37
+    return ndtr(x)
+
+def norm_pdf(x):
+    # float32 input stays float32 (see the precision option in black_scholes.py)
+    x = np.asarray(x)
+    if x.dtype != np.float32:
+        x = x.astype(float, copy=False)
+    return x.dtype.type(INV_SQRT_2PI) * np.exp(-0.5 * x * x)
+
+# Accuracy harness: compare against scipy.stats.norm across the body and both tails.
+# Returns the worst relative error for each function; both should sit at machine precision.
+def check_accuracy(num_points=200001, lower=-37.5, upper=8.5, tolerance=1e-14):
+    from scipy.stats import norm
+
+    x = np.linspace(lower, upper, num_points)
+    reference_cdf = norm.cdf(x)
+    reference_pdf = norm.pdf(x)
+
+    nonzero_cdf = reference_cdf > 0
+    nonzero_pdf = reference_pdf > 0
+    cdf_error = np.max(np.abs(norm_cdf(x)[nonzero_cdf] / reference_cdf[nonzero_cdf] - 1))
+    pdf_error = np.max(np.abs(norm_pdf(x)[nonzero_pdf] / reference_pdf[nonzero_pdf] - 1))
+
+    if cdf_error > tolerance or pdf_error > tolerance:
+        raise AssertionError(f"norm_cdf/norm_pdf drifted from scipy.stats.norm: cdf {cdf_error:.3e}, pdf {pdf_error:.3e}")
+    return {"cdf": cdf_error, "pdf": pdf_error}
+
+# Micro-benchmark of the fast path against scipy.stats.norm on scalar and array inputs.
+# Returns {input size: (scipy seconds per call, fast seconds per call, speedup)}.
+def benchmark(sizes=(1, 100, 10_000, 1_000_000), repeat=5):
+    from scipy.stats import norm
+
+    results = {}
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        x = 0.3 if size == 1 else rng.standard_normal(size)
+        number = max(1, 200_000 // size)
+        scipy_time = min(timeit.repeat(lambda: (norm.cdf(x), norm.pdf(x)), number=number, repeat=repeat)) / number
+        fast_time = min(timeit.repeat(lambda: (norm_cdf(x), norm_pdf(x)), number=number, repeat=repeat)) / number
+        results[size] = (scipy_time, fast_time, scipy_time / fast_time)
+    return results
+
+if __name__ == "__main__":
+    errors = check_accuracy()
+    print(f"Max relative error vs scipy.stats.norm: cdf {errors['cdf']:.2e}, pdf {errors['pdf']:.2e}")
+    for size, (scipy_time, fast_time, speedup) in benchmark().items():
+        print(f"n={size:>9,}: scipy.stats.norm {scipy_time * 1e6:10.2f} us, fast_norm {fast_time * 1e6:10.2f} us, {speedup:6.1f}x")
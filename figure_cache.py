@@ -0,0 +1,39 @@
+# figure_cache.py
+# Process-wide cache for heatmap grids and rendered figures. Page functions that build a
+# grid or a matplotlib figure from scalar inputs are wrapped so that a Streamlit rerun
+# with unchanged parameters (switching tabs, touching an unrelated widget) serves the
+# stored arrays or PNG bytes instead of recomputing and re-rendering. Both stores are
+# bounded LRUs with a ttl; sizes and ttl (seconds) can be set through the environment.
+import functools
+import io
+import os
+import matplotlib.pyplot as plt
+import streamlit as st
+from matplotlib.figure import Figure
+from pricing_cache import PricingCache
+
+grid_cache = PricingCache(capacity=int(os.environ.get("GRID_CACHE_SIZE", 256)), ttl=float(os.environ.get("GRID_CACHE_TTL", 3600)))
+figure_cache = PricingCache(capacity=int(os.environ.get("FIGURE_CACHE_SIZE", 128)), ttl=float(os.environ.get("FIGURE_CACHE_TTL", 3600)))
+
+# Same settings st.pyplot uses, so cached images look identical to live ones
+def figure_to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+def cache_grid(function):
+    return grid_cache.memoize(function)
+
+# Figures returned by the wrapped function (alone or in a tuple) are stored as PNG bytes
+def cache_figure(function):
+    @functools.wraps(function)
+    def render(*args, **kwargs):
+        result = function(*args, **kwargs)
+        if isinstance(result, tuple):
+            return tuple(figure_to_png(item) if isinstance(item, Figure) else item for item in result)
+        return figure_to_png(result)
+    return figure_cache.memoize(render)
+
+def show_figure(png):
+    st.image(png, use_column_width=True)
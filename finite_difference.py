@@ -0,0 +1,164 @@
+# finite_difference.py
+# Crank-Nicolson finite differences for the Black-Scholes PDE. A heatmap needs prices over
+# a whole spot axis, and one PDE solve yields the price (and delta and gamma) at every
+# node of a spot grid at once, so a 10 x 10 heatmap costs one solve per vol row rather than
+# one evaluation per cell. Early exercise is applied by projection: after every time step
+# the values are floored at the exercise value.
+#
+# Every distinct (K, T, r, sigma, call/put) in a request gets its own uniform grid on
+# [0, S_max] with S_max well beyond both the strike and the highest spot asked for. All of
+# these systems are advanced together: their tridiagonal matrices are laid end to end as
+# the diagonal blocks of one tridiagonal matrix (the rows holding the boundary values cut
+# the coupling between blocks). The left-hand side never changes, so it is LU factored once
+# (LAPACK gttrf) and each time step is a single back substitution (gttrs) over every vol row
+# and every leg, plus a few vectorized array updates; this is about twice as fast as calling
+# scipy.linalg.solve_banded, which refactors the matrix on every call.
+#
+# Crank-Nicolson is second order in time but lets the kink of the payoff at the strike ring
+# through the first steps as oscillations in delta and gamma. Rannacher smoothing replaces
+# the first rannacher_steps steps by two fully implicit half steps each, which damps them;
+# an implicit half step has the same left-hand side, I - dt/2 L, as a Crank-Nicolson step,
+# so one factorization serves both.
+from collections import namedtuple
+import timeit
+import numpy as np
+from scipy.linalg.lapack import dgttrf, dgttrs
+from black_scholes import all_greeks, option_price
+
+FDResult = namedtuple("FDResult", ["price", "delta", "gamma"])
+
+# Values on the grid of every system after time stepping back from expiry: arrays of shape
+# (systems, num_space + 1) for the values and (systems,) for the grid spacing
+def solve_grids(K, T, r, sigma, is_call, S_max, american, num_space, num_time, rannacher_steps):
+    systems = K.size
+    column = lambda x: x[:, np.newaxis]
+    dS = S_max / num_space
+    spots = column(dS) * np.arange(num_space + 1)
+    dt = column(T / num_time)
+    sign = column(np.where(is_call, 1.0, -1.0))
+    exercise = np.maximum(sign * (spots - column(K)), 0.0)
+    values = exercise.copy()
+
+    # L V at interior node i = lower V[i-1] + diagonal V[i] + upper V[i+1]
+    i = np.arange(1, num_space)
+    variance = column(sigma ** 2) * i ** 2
+    lower = 0.5 * (variance - column(r) * i)
+    diagonal = -(variance + column(r))
+    upper = 0.5 * (variance + column(r) * i)
+
+    # Left-hand side I - dt/2 L as sub-, main and super-diagonals; boundary rows are the
+    # identity, which leaves zeros in the off-diagonals between consecutive systems
+    half = 0.5 * dt
+    sub_diagonal, main_diagonal, super_diagonal = np.zeros((systems, num_space + 1)), np.ones((systems, num_space + 1)), np.zeros((systems, num_space + 1))
+    sub_diagonal[:, :-2] = -half * lower
+    main_diagonal[:, 1:-1] = 1.0 - half * diagonal
+    super_diagonal[:, 2:] = -half * upper
+    factors = dgttrf(sub_diagonal.ravel()[:-1], main_diagonal.ravel(), super_diagonal.ravel()[1:])[:-1]
+
+    def boundaries(tau):
+        discount = np.exp(-column(r) * tau)
+        strike = column(K) if american else column(K) * discount
+        low = np.where(column(is_call), 0.0, strike)
+        high = np.where(column(is_call), column(S_max) - column(K) * discount, 0.0)
+        return low, high
+
+    # One Crank-Nicolson step (explicit half of L on the right-hand side) or one fully implicit
+    # half step (none); both solve against I - dt/2 L
+    def step(values, tau, crank_nicolson):
+        rhs = values.copy()
+        if crank_nicolson:
+            rhs[:, 1:-1] += half * (lower * values[:, :-2] + diagonal * values[:, 1:-1] + upper * values[:, 2:])
+        rhs[:, :1], rhs[:, -1:] = boundaries(tau)
+        values = dgttrs(*factors, rhs.ravel())[0].reshape(systems, -1)
+        return np.maximum(values, exercise) if american else values
+
+    tau = np.zeros((systems, 1))
+    for n in range(num_time):
+        if n < rannacher_steps:
+            for _ in range(2):
+                tau = tau + 0.5 * dt
+                values = step(values, tau, crank_nicolson=False)
+        else:
+            tau = tau + dt
+            values = step(values, tau, crank_nicolson=True)
+    return values, dS
+
+# Price, delta and gamma of options (S, K, T, r, sigma and is_call broadcast together), each
+# distinct contract solved once for all of its spots. Between grid nodes the values are
+# expanded to second order about the nearest node; expired contracts get their payoff and its slope.
+def fd_price(S, K, T, r, sigma, is_call, american=False, num_space=800, num_time=100, rannacher_steps=2):
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma)), np.asarray(is_call, dtype=bool))
+    shape = arrays[0].shape
+    S, K, T, r, sigma, is_call = (x.ravel() for x in arrays)
+    sign = np.where(is_call, 1.0, -1.0)
+    price = np.maximum(sign * (S - K), 0.0)
+    delta = np.where(sign * (S - K) > 0, sign, 0.0)
+    gamma = np.zeros(S.size)
+
+    live = np.flatnonzero(T > 0)
+    if live.size:
+        keys, inverse = np.unique(np.column_stack((K[live], T[live], r[live], sigma[live], is_call[live])), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        K_u, T_u, r_u, sigma_u, is_call_u = keys.T
+        # Far enough out that the boundary values hardly matter: four standard deviations of
+        # log spot past the larger of the strike and the highest spot asked for
+        highest = np.zeros(len(keys))
+        np.maximum.at(highest, inverse, S[live])
+        S_max = np.maximum(K_u, highest) * np.maximum(np.exp(4 * sigma_u * np.sqrt(T_u)), 2.0)
+        values, dS = solve_grids(K_u, T_u, r_u, sigma_u, is_call_u.astype(bool), S_max, american, num_space, num_time, rannacher_steps)
+
+        # Central differences on the grid, then a second-order Taylor expansion about the
+        # nearest node to each requested spot
+        grid_delta = np.gradient(values, axis=1) / dS[:, np.newaxis]
+        grid_gamma = np.zeros_like(values)
+        grid_gamma[:, 1:-1] = (values[:, 2:] - 2 * values[:, 1:-1] + values[:, :-2]) / dS[:, np.newaxis] ** 2
+        node = np.clip(np.rint(S[live] / dS[inverse]).astype(np.int64), 1, num_space - 1)
+        h = S[live] - node * dS[inverse]
+        node_delta, node_gamma = grid_delta[inverse, node], grid_gamma[inverse, node]
+        price[live] = values[inverse, node] + node_delta * h + 0.5 * node_gamma * h ** 2
+        delta[live] = node_delta + node_gamma * h
+        # Gamma itself is interpolated linearly between the two nodes around the spot
+        neighbour = np.clip(node + np.sign(h).astype(np.int64), 1, num_space - 1)
+        weight = np.abs(h) / dS[inverse]
+        gamma[live] = (1 - weight) * node_gamma + weight * grid_gamma[inverse, neighbour]
+    return FDResult(price.reshape(shape), delta.reshape(shape), gamma.reshape(shape))
+
+# Prices, deltas and gammas over a heatmap: rows are vols, columns are spots, one solve per row
+def fd_grid(spots, K, T, r, vols, option_type="call", american=False, num_space=800, num_time=100):
+    if option_type not in ("call", "put"):
+        raise ValueError(f"Unknown option type: {option_type}")
+    spots, vols = np.asarray(spots, dtype=float), np.asarray(vols, dtype=float)
+    return fd_price(spots[np.newaxis, :], K, T, r, vols[:, np.newaxis], option_type == "call", american, num_space, num_time)
+
+# European prices and Greeks over a 10 x 10 spot x vol heatmap against the closed form, with
+# and without Rannacher smoothing, for fine and coarse time steps, and the time for the whole
+# heatmap. Returns {(num_time, rannacher_steps): (seconds, max price error, max delta error,
+# max gamma error)}.
+def benchmark(K=100.0, T=1.0, r=0.03, spot_range=(80.0, 135.0), vol_range=(0.1, 0.3), num_space=800, time_steps=(100, 25), repeat=3):
+    spots, vols = np.linspace(*spot_range, 10), np.linspace(*vol_range, 10)
+    greeks = all_greeks(spots[np.newaxis, :], K, T, r, vols[:, np.newaxis])
+    results = {}
+    for num_time in time_steps:
+        for rannacher_steps in (0, 2):
+            run = lambda: fd_price(spots[np.newaxis, :], K, T, r, vols[:, np.newaxis], True, False, num_space, num_time, rannacher_steps)
+            seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+            result = run()
+            results[(num_time, rannacher_steps)] = (seconds, float(np.max(np.abs(result.price - greeks.call_price))),
+                                                    float(np.max(np.abs(result.delta - greeks.call_delta))),
+                                                    float(np.max(np.abs(result.gamma - greeks.gamma))))
+    return results
+
+if __name__ == "__main__":
+    for (num_time, rannacher_steps), (seconds, price, delta, gamma) in benchmark().items():
+        print(f"{num_time:>3} time steps, Rannacher steps {rannacher_steps}: 10 x 10 call heatmap in {seconds * 1e3:.1f} ms, "
+              f"max error price {price:.1e} delta {delta:.1e} gamma {gamma:.1e}")
+    from lattice import american_price
+    spots = np.linspace(80.0, 120.0, 5)
+    fd = fd_price(spots, 100.0, 1.0, 0.05, 0.2, False, american=True).price
+    tree = american_price(spots, 100.0, 1.0, 0.05, 0.2, "put", steps=800)
+    print("American put, finite differences vs binomial tree:", np.round(fd, 4), np.round(tree, 4))
+    grid_spots, grid_vols = np.linspace(80.0, 135.0, 10), np.linspace(0.1, 0.3, 10)
+    fd_seconds = min(timeit.repeat(lambda: fd_grid(grid_spots, 100.0, 1.0, 0.05, grid_vols, "put", american=True), number=1, repeat=3))
+    tree_seconds = min(timeit.repeat(lambda: american_price(grid_spots[np.newaxis, :], 100.0, 1.0, 0.05, grid_vols[:, np.newaxis], "put"), number=1, repeat=3))
+    print(f"10 x 10 American put heatmap: finite differences {fd_seconds * 1e3:.1f} ms, binomial tree {tree_seconds * 1e3:.1f} ms")
+    print("European put at the money:", float(fd_price(100.0, 100.0, 1.0, 0.05, 0.2, False).price), float(option_price(100.0, 100.0, 1.0, 0.05, 0.2, "put")))
@@ -0,0 +1,112 @@
+# hedge_solver.py
+# Multi-Greek hedging over a universe of candidate instruments (the underlying plus calls
+# and puts across strikes and expiries). The per-unit Greeks of every candidate are
+# computed once, in one vectorized call, into an exposure matrix E (Greeks x instruments);
+# a hedge is then the vector of quantities q that makes the hedged book E q + g small for
+# the position's Greeks g, solved as
+#   "least_squares" - min ||W (E q + g)||^2 + penalty * ||c * q||^2. With no penalty this
+#                     is the minimum-norm exact hedge whenever one exists (one lstsq call);
+#                     the penalty trades residual Greeks for smaller trades in expensive
+#                     instruments and is solved through a Greeks x Greeks system, so its
+#                     cost grows only linearly with the number of instruments.
+#   "min_cost"      - min sum(c * |q|) subject to E q + g = 0 exactly, as a linear program.
+#                     Transaction costs are linear in size, so the optimum uses at most one
+#                     instrument per neutralized Greek.
+# W scales each Greek by the largest per-unit exposure in the universe so that no Greek
+# dominates the residual just because of its units; c is the per-unit transaction cost.
+from collections import namedtuple
+import timeit
+import numpy as np
+from scipy.optimize import linprog
+from black_scholes import call_price, put_price
+from portfolio import KINDS, per_unit_values
+
+GREEKS = ("Delta", "Gamma", "Vega", "Rho", "Theta")
+METHODS = ("least_squares", "min_cost")
+
+# kind indexes into portfolio.KINDS; strike and expiry are ignored for the underlying
+HedgeUniverse = namedtuple("HedgeUniverse", ["kind", "strikes", "expiries", "costs", "labels"])
+
+HedgeResult = namedtuple("HedgeResult", ["quantities", "residual", "cost", "method"])
+
+# Underlying plus a call and a put at every strike x expiry. Costs per unit are a fraction of
+# each instrument's model price (the underlying pays the same fraction of spot), but never
+# less than one tick.
+def hedge_universe(S, strikes, expiries, r, sigma, cost_rate=0.0, tick=0.0, include_underlying=True):
+    K, T = (x.ravel() for x in np.meshgrid(np.asarray(strikes, dtype=float), np.asarray(expiries, dtype=float)))
+    kind = np.concatenate((np.full(K.size, KINDS.index("call")), np.full(K.size, KINDS.index("put"))))
+    K, T = np.tile(K, 2), np.tile(T, 2)
+    labels = [f"{KINDS[code].capitalize()} K={strike:.2f} T={expiry:.2f}" for code, strike, expiry in zip(kind, K, T)]
+    prices = np.where(kind == KINDS.index("call"), call_price(S, K, T, r, sigma), put_price(S, K, T, r, sigma))
+    if include_underlying:
+        kind = np.append(KINDS.index("underlying"), kind)
+        K, T = np.append(0.0, K), np.append(0.0, T)
+        prices = np.append(S, prices)
+        labels = ["Underlying"] + labels
+    return HedgeUniverse(kind, K, T, np.maximum(cost_rate * prices, tick), labels)
+
+# Per-unit Greeks of every candidate: shape (len(greeks), instruments)
+def exposure_matrix(universe, S, r, sigma, greeks=GREEKS):
+    values = per_unit_values(universe.kind, universe.strikes, universe.expiries, S, r, sigma)
+    return np.array([np.broadcast_to(values[greek], universe.kind.shape) for greek in greeks], dtype=float)
+
+# Quantities of each candidate that neutralize target (the position's Greeks, one per row of
+# exposure). costs are per unit; penalty only applies to least squares.
+def solve_hedge(target, exposure, costs=None, method="least_squares", penalty=0.0, weights=None):
+    target = np.asarray(target, dtype=float)
+    exposure = np.asarray(exposure, dtype=float)
+    num_greeks, num_instruments = exposure.shape
+    costs = np.zeros(num_instruments) if costs is None else np.asarray(costs, dtype=float)
+    if weights is None:
+        scale = np.max(np.abs(exposure), axis=1)
+        weights = 1 / np.where(scale > 0, scale, 1.0)
+
+    # Free instruments still get a small charge: without it near-worthless far out-of-the-money
+    # options look like unlimited free Greeks, and both problems degenerate in floating point
+    charge = np.maximum(costs, 1e-6 * max(costs.max(initial=0.0), 1.0))
+
+    if method == "least_squares":
+        system = weights[:, np.newaxis] * exposure
+        rhs = -weights * target
+        if penalty > 0:
+            # Ridge in the scaled variables y = c * q, solved through the small Greeks x Greeks
+            # system: y = B^T (B B^T + penalty I)^-1 rhs with B = system / c
+            scaled = system / charge
+            quantities = scaled.T @ np.linalg.solve(scaled @ scaled.T + penalty * np.eye(num_greeks), rhs) / charge
+        else:
+            quantities = np.linalg.lstsq(system, rhs, rcond=None)[0]
+    elif method == "min_cost":
+        # q = buy - sell with buy, sell >= 0
+        solution = linprog(np.concatenate((charge, charge)), A_eq=np.hstack((exposure, -exposure)), b_eq=-target,
+                           bounds=(0, None), method="highs")
+        if not solution.success:
+            raise ValueError(f"No exact hedge in this universe: {solution.message}")
+        quantities = solution.x[:num_instruments] - solution.x[num_instruments:]
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+    residual = target + exposure @ quantities
+    return HedgeResult(quantities, residual, float(np.abs(quantities) @ costs), method)
+
+# Solve time for growing universes hedging delta, gamma and vega of a short straddle.
+# Returns {instruments: {method: (seconds, max abs residual)}}.
+def benchmark(S=100.0, r=0.03, sigma=0.25, num_strikes=(5, 25, 50, 100), expiries=(0.08, 0.25, 0.5, 1.0), repeat=3):
+    greeks = ("Delta", "Gamma", "Vega")
+    position = hedge_universe(S, [S], [0.25], r, sigma, include_underlying=False)
+    target = -exposure_matrix(position, S, r, sigma, greeks).sum(axis=1)
+    results = {}
+    for count in num_strikes:
+        universe = hedge_universe(S, np.linspace(0.7 * S, 1.3 * S, count), expiries, r, sigma, cost_rate=0.01, tick=0.01)
+        exposure = exposure_matrix(universe, S, r, sigma, greeks)
+        runs = {}
+        for method in METHODS:
+            solve = lambda: solve_hedge(target, exposure, universe.costs, method, penalty=1e-4)
+            seconds = min(timeit.repeat(solve, number=1, repeat=repeat))
+            runs[method] = (seconds, float(np.max(np.abs(solve().residual))))
+        results[len(universe.kind)] = runs
+    return results
+
+if __name__ == "__main__":
+    for instruments, runs in benchmark().items():
+        print(f"{instruments:>4} instruments: " + " | ".join(
+            f"{method} {seconds * 1e3:6.2f} ms residual {residual:.1e}" for method, (seconds, residual) in runs.items()))
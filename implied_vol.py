@@ -0,0 +1,90 @@
+# implied_vol.py
+# Batch implied volatility inversion of Black-Scholes prices. A whole chain is solved
+# at once: safeguarded Newton steps from a Corrado-Miller starting point, with a
+# per-element volatility bracket that falls back to bisection whenever Newton would
+# leave it. Only elements that have not yet converged are carried between iterations.
+from collections import namedtuple
+import numpy as np
+from black_scholes import call_price, put_price
+from fast_norm import norm_pdf
+
+ImpliedVolResult = namedtuple("ImpliedVolResult", ["sigma", "converged", "iterations"])
+
+SIGMA_MIN = 1e-6
+SIGMA_MAX = 10.0
+
+# Corrado-Miller (1996) rational approximation, used as the Newton starting point
+def initial_guess(call_value, S, discounted_K, T):
+    half_gap = (S - discounted_K) / 2
+    excess = call_value - half_gap
+    radicand = np.maximum(excess ** 2 - (S - discounted_K) ** 2 / np.pi, 0.0)
+    guess = np.sqrt(2 * np.pi / T) / (S + discounted_K) * (excess + np.sqrt(radicand))
+    return np.where(np.isfinite(guess) & (guess > SIGMA_MIN), np.minimum(guess, SIGMA_MAX), 0.2)
+
+# Out-of-the-money side of each contract: puts for strikes below the forward, calls above it.
+# Inverting the OTM price keeps full relative precision in the time value.
+def otm_price(S, K, T, r, sigma, otm_put):
+    return np.where(otm_put, put_price(S, K, T, r, sigma), call_price(S, K, T, r, sigma))
+
+def implied_volatility(price, S, K, T, r, option_type="call", tol=1e-10, max_iter=100):
+    price, S, K, T, r = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (price, S, K, T, r)))
+    is_put = np.broadcast_to(np.asarray(option_type) == "put", price.shape)
+    discounted_K = K * np.exp(-r * T)
+
+    # Map every quote onto its OTM option through put-call parity (C - P = S - K e^-rT)
+    parity = S - discounted_K
+    otm_put = parity > 0
+    target = np.where(is_put, price + np.minimum(parity, 0.0), price - np.maximum(parity, 0.0))
+    target, S, K, T, r, otm_put = (x.ravel() for x in (target, S, K, T, r, otm_put))
+
+    sigma = np.full(target.shape, np.nan)
+    converged = np.zeros(target.shape, dtype=bool)
+    iterations = np.zeros(target.shape, dtype=int)
+
+    # Prices outside the no-arbitrage band have no implied volatility
+    valid = (target > 0) & (T > 0) & (target < otm_price(S, K, T, r, SIGMA_MAX, otm_put))
+
+    idx = np.flatnonzero(valid)
+    c, s, k, t, rate, put_side = target[idx], S[idx], K[idx], T[idx], r[idx], otm_put[idx]
+    lo = np.full(idx.shape, SIGMA_MIN)
+    hi = np.full(idx.shape, SIGMA_MAX)
+    dk = k * np.exp(-rate * t)
+    vol = initial_guess(c + np.maximum(s - dk, 0.0), s, dk, t)
+
+    for iteration in range(1, max_iter + 1):
+        if idx.size == 0:
+            break
+        sqrt_t = np.sqrt(t)
+        d1 = (np.log(s / k) + (rate + 0.5 * vol ** 2) * t) / (vol * sqrt_t)
+        diff = otm_price(s, k, t, rate, vol, put_side) - c
+        vega = s * norm_pdf(d1) * sqrt_t
+
+        # Option prices increase in sigma, so the sign of the error tightens the bracket
+        lo = np.where(diff < 0, vol, lo)
+        hi = np.where(diff > 0, vol, hi)
+
+        done = (np.abs(diff) <= tol * c) | (hi - lo <= tol * vol)
+        sigma[idx[done]] = vol[done]
+        converged[idx[done]] = True
+        iterations[idx[done]] = iteration
+
+        keep = ~done
+        idx, c, s, k, t, rate, put_side = idx[keep], c[keep], s[keep], k[keep], t[keep], rate[keep], put_side[keep]
+        lo, hi, vol, diff, vega = lo[keep], hi[keep], vol[keep], diff[keep], vega[keep]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = vol - diff / vega
+        inside = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        vol = np.where(inside, newton, 0.5 * (lo + hi))
+
+    # Whatever is still active after max_iter keeps its last iterate but is flagged as not converged
+    sigma[idx] = vol
+    iterations[idx] = max_iter
+
+    shape = price.shape
+    return ImpliedVolResult(sigma.reshape(shape), converged.reshape(shape), iterations.reshape(shape))
+
+# Display strings for a handful of quotes, e.g. next to the purchase price inputs
+def implied_vol_labels(price, S, K, T, r, option_type="call"):
+    result = implied_volatility(price, S, K, T, r, option_type)
+    return [f"{vol:.2%}" if ok else "n/a" for vol, ok in zip(np.ravel(result.sigma), np.ravel(result.converged))]
@@ -21,7 +21,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from kdb_utils import KDBUtils
 
 # Importing pages
-from black_scholes import BlackScholes
+from adaptive_grid import RESOLUTIONS
+from strategies import MODELS
+from black_scholes import PRECISIONS, BlackScholes, pricing_cache, use_backend_selector
+from backends import get_selector
+from implied_vol import implied_vol_labels
 from Home.Call_and_Put import show_page as Call_and_Put
 
 # Trade Strategies
@@ -37,6 +41,9 @@ from Potential_Trade_Strategies._8_Strangle_Trades import show_page as Strangle_
 # Hedges
 from Optimal_Hedges.Optimal_Hedges import show_page as Optimal_Hedges
 
+# Portfolio
+from Portfolio_Aggregation.Portfolio_Aggregation import show_page as Portfolio_Aggregation
+
 # Page configuration
 st.set_page_config(
     page_title="Option Pricing Series",
@@ -44,6 +51,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Dispatch array pricing calls to the fastest backend; tuned once per process
+use_backend_selector(get_selector())
+
 # Initialize KDB+ Utils
 kdb = None
 try:
@@ -65,6 +75,8 @@ def setup_sidebar():
         call_price, put_price = bs_model.calculate_prices()
         purchase_price_call = st.number_input("Call Purchase Price (Default is option price)", value=call_price, key="op_purchase_price_call")
         purchase_price_put = st.number_input("Put Purchase Price (Default is option price)", value=put_price, key="op_purchase_price_put")
+        implied_call, implied_put = implied_vol_labels([purchase_price_call, purchase_price_put], S, K, T, r, ["call", "put"])
+        st.caption(f"Implied volatility at these prices: call {implied_call}, put {implied_put}")
         
         st.markdown("**Disclaimer:** Changing the purchase prices may cause arbitrage.")
 
@@ -73,6 +85,14 @@ def setup_sidebar():
         spot_max = st.number_input('Max Spot Price', min_value=0.01, value=S*1.35, step=0.01, key="hp_spot_max")
         vol_min = st.slider('Min Volatility for Heatmap', min_value=0.01, max_value=1.0, value=sigma*0.5, step=0.01, key="hp_vol_min")
         vol_max = st.slider('Max Volatility for Heatmap', min_value=0.01, max_value=1.0, value=sigma*1.5, step=0.01, key="hp_vol_max")
+        st.selectbox("Heatmap Resolution", RESOLUTIONS, format_func=str.capitalize, key="hp_resolution",
+                     help="Adaptive draws a 200 x 200 heatmap instead of the annotated 10 x 10 grid: priced directly under Black-Scholes, refined around strikes and breakevens under the slower models")
+        st.selectbox("Heatmap Pricing Model", MODELS, format_func=lambda name: {"black_scholes": "Black-Scholes (European)", "american": "Binomial tree (American)",
+                                                                                          "finite_difference": "Finite differences (American)"}[name],
+                     key="hp_model", help="Price the options on the profit heatmaps with early exercise")
+        st.selectbox("Heatmap Precision", list(PRECISIONS), key="hp_precision",
+                     help="float32 halves the memory of the heatmap, scenario cube, Greek surface and portfolio chart grids, "
+                          "at about 1e-6 relative accuracy (see precision.py); totals and Greeks shown as numbers stay in float64")
     
     return S, K, T, sigma, r, purchase_price_call, purchase_price_put, spot_min, spot_max, vol_min, vol_max
 
@@ -99,7 +119,7 @@ def store_user_input(option_id, S, K, T, sigma, r, purchase_price_call, purchase
 
 # Top header navigation using tabs
 st.title("Option Pricer 3.0")
-tabs = st.tabs(["Call and Put", "Trade Strategies", "Optimal Hedges"])
+tabs = st.tabs(["Call and Put", "Trade Strategies", "Optimal Hedges", "Portfolio"])
 
 S, K, T, sigma, r, purchase_price_call, purchase_price_put, spot_min, spot_max, vol_min, vol_max = setup_sidebar()
 
@@ -141,6 +161,13 @@ with tabs[2]:
     st.header("Optimal Hedges")
     Optimal_Hedges()
 
+with tabs[3]:
+    st.header("Portfolio")
+    Portfolio_Aggregation(S, K, T, sigma, r, spot_min, spot_max)
+
+with st.sidebar.expander("Pricing Cache"):
+    st.write(pricing_cache.stats())
+
 # Close KDB+ connection when done
 if kdb:
     kdb.close()
@@ -0,0 +1,285 @@
+# monte_carlo.py
+# Monte Carlo pricing of European and arithmetic-average Asian options under geometric
+# Brownian motion. Paths are generated as NumPy matrices (chunk_size paths x num_steps
+# monitoring dates) one chunk at a time, and each chunk is reduced on the spot to running
+# sums, so memory is bounded by the chunk whatever the number of paths and a run of 10^7
+# paths never holds more than one chunk.
+#
+# Variance reduction:
+#   antithetic variates - every normal draw z is also used as -z; the pair's average payoff
+#                         is one sample. For a European option exp(sigma sqrt(T) z) is
+#                         computed once and the antithetic terminal price is a division.
+#   control variate     - a quantity X with a known mean is simulated alongside the payoff
+#                         Y, and the estimate is mean(Y) - b (mean(X) - E[X]) with
+#                         b = cov(X, Y) / var(X). For Asian options X is the discounted
+#                         European payoff at the same strike and E[X] its closed-form
+#                         Black-Scholes price; for European options (whose own closed form
+#                         would make the exercise moot) X is the discounted terminal spot,
+#                         with E[X] = S.
+# Standard errors come from the same running sums: std(Y - b X) / sqrt(samples).
+#
+# Parallel runs. Every chunk draws from its own stream, seeded by a SeedSequence spawned
+# from the master seed with the chunk's index as spawn key, so chunks are independent of
+# each other and of which process computes them. With workers > 1 the chunks are handed to
+# a process pool and their partial sums are merged in chunk order, so a run is
+# bit-for-bit identical for any worker count (it does depend on chunk_size, which decides
+# how the draws are split into streams).
+#
+# Quasi-random sampling. sampler="sobol" replaces the pseudo-random normals with scrambled
+# Sobol points (scipy.stats.qmc) mapped through the inverse normal CDF, whose error falls
+# close to O(N^-1) instead of O(N^-1/2) for smooth enough payoffs. Sobol points are most
+# uniform in their first dimensions, so Asian paths are built with a Brownian bridge: the
+# first dimension fixes W(T), the next W(T/2), then the quarter points and so on, putting
+# the coarse shape of every path - which drives most of the payoff's variance - in the
+# best-distributed coordinates. A single Sobol sequence carries no error estimate, so the
+# points are split into independent scramblings (replicates, each a power of two long)
+# and the standard error is taken across the replicate estimates; replicates rather than
+# chunks are then the unit of parallel work, and each keeps its chunks in sequence order.
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import os
+import timeit
+import numpy as np
+from scipy.special import ndtri
+from scipy.stats import qmc
+from black_scholes import option_price
+
+PAYOFFS = ("european", "asian")
+SAMPLERS = ("pseudo", "sobol")
+
+MonteCarloResult = namedtuple("MonteCarloResult", ["price", "std_error", "num_paths"])
+
+# Running sums of the payoff Y and control X over the samples seen so far
+class Moments(namedtuple("Moments", ["count", "y", "yy", "x", "xx", "xy"])):
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, y, x):
+        return cls(y.size, y.sum(), y @ y, x.sum(), x @ x, x @ y)
+
+    def __add__(self, other):
+        return Moments(*(a + b for a, b in zip(self, other)))
+
+    # (estimate, standard error), with or without the control (mean control_mean)
+    def estimate(self, control_mean=None):
+        n = self.count
+        mean_y = self.y / n
+        var_y = max(self.yy / n - mean_y ** 2, 0.0)
+        if control_mean is None:
+            return mean_y, np.sqrt(var_y / max(n - 1, 1))
+        mean_x = self.x / n
+        var_x = self.xx / n - mean_x ** 2
+        cov = self.xy / n - mean_x * mean_y
+        b = cov / var_x if var_x > 0 else 0.0
+        return mean_y - b * (mean_x - control_mean), np.sqrt(max(var_y - b * cov, 0.0) / max(n - 1, 1))
+
+def payoff_of(prices, K, is_call):
+    return np.maximum(prices - K, 0) if is_call else np.maximum(K - prices, 0)
+
+# Order in which a Brownian bridge fills num_steps equally spaced dates of [0, T]: at every
+# construction step, point W[index] = a W[left] + b W[right] + c z with left and right the
+# nearest dates already built. Indices are 1-based, 0 being W(0) = 0.
+BridgePlan = namedtuple("BridgePlan", ["index", "left", "right", "a", "b", "c"])
+
+def bridge_plan(num_steps, T):
+    times = np.linspace(0.0, T, num_steps + 1)
+    plan = [(num_steps, 0, 0, 0.0, 0.0, np.sqrt(T))]
+    intervals = [(0, num_steps)]
+    while intervals:
+        left, right = intervals.pop(0)
+        if right - left < 2:
+            continue
+        middle = (left + right) // 2
+        span = times[right] - times[left]
+        a, b = (times[right] - times[middle]) / span, (times[middle] - times[left]) / span
+        plan.append((middle, left, right, a, b, np.sqrt((times[middle] - times[left]) * (times[right] - times[middle]) / span)))
+        intervals += [(left, middle), (middle, right)]
+    return BridgePlan(*(np.array(column) for column in zip(*plan)))
+
+# Brownian motion at the plan's dates from a (paths, num_steps) matrix of normals, one
+# column per construction step
+def brownian_bridge(z, plan):
+    W = np.zeros((z.shape[0], z.shape[1] + 1))
+    for step, (index, left, right, a, b, c) in enumerate(zip(*plan)):
+        W[:, index] = a * W[:, left] + b * W[:, right] + c * z[:, step]
+    return W[:, 1:]
+
+# (size, dimensions) standard normals from the next points of a Sobol engine
+def sobol_normals(engine, size):
+    return ndtri(np.clip(engine.random(size), 2.0 ** -53, 1 - 2.0 ** -53))
+
+# Discounted payoffs Y and controls X of one chunk of samples from a (size, num_steps) matrix
+# of normals (a single column for European options); with antithetic variates each sample is
+# the average over a path and its mirror image. With bridge, Asian paths are built by
+# Brownian bridge instead of by cumulating increments.
+def chunk_samples(S, K, T, r, sigma, is_call, payoff, z, antithetic, bridge=None):
+    discount = np.exp(-r * T)
+    if payoff == "european":
+        growth = np.exp(sigma * np.sqrt(T) * z[:, 0])
+        forward = S * np.exp((r - 0.5 * sigma ** 2) * T)
+        terminals = (forward * growth, forward / growth) if antithetic else (forward * growth,)
+        y = sum(payoff_of(S_T, K, is_call) for S_T in terminals)
+        x = sum(terminals)
+    else:
+        num_steps = z.shape[1]
+        dt = T / num_steps
+        drift = (r - 0.5 * sigma ** 2) * dt * np.arange(1, num_steps + 1)
+        if bridge is None:
+            noise = np.cumsum(z, axis=1)
+            noise *= sigma * np.sqrt(dt)
+        else:
+            noise = brownian_bridge(z, bridge)
+            noise *= sigma
+        paths = (S * np.exp(drift + noise), S * np.exp(drift - noise)) if antithetic else (S * np.exp(drift + noise),)
+        y = sum(payoff_of(path.mean(axis=1), K, is_call) for path in paths)
+        x = sum(payoff_of(path[:, -1], K, is_call) for path in paths)
+    scale = discount / (2 if antithetic else 1)
+    return y * scale, x * scale
+
+# Partial sums of chunk index out of num_samples, drawn from that chunk's own stream.
+# Module-level so that it can be sent to worker processes.
+def chunk_moments(index, S, K, T, r, sigma, is_call, payoff, num_steps, rows, num_samples, antithetic, seed):
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    size = min(rows, num_samples - index * rows)
+    z = rng.standard_normal((size, num_steps if payoff == "asian" else 1))
+    return Moments.of(*chunk_samples(S, K, T, r, sigma, is_call, payoff, z, antithetic))
+
+# Partial sums of one scrambled Sobol replicate of size points (a power of two), drawn in
+# chunks of rows points in sequence order
+def replicate_moments(index, S, K, T, r, sigma, is_call, payoff, num_steps, rows, size, antithetic, seed):
+    dimensions = num_steps if payoff == "asian" else 1
+    engine = qmc.Sobol(dimensions, scramble=True, seed=np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,))))
+    bridge = bridge_plan(num_steps, T) if payoff == "asian" else None
+    moments = Moments(0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    for start in range(0, size, rows):
+        z = sobol_normals(engine, min(rows, size - start))
+        moments += Moments.of(*chunk_samples(S, K, T, r, sigma, is_call, payoff, z, antithetic, bridge))
+    return moments
+
+# Price with standard error from num_paths simulated paths (with antithetic variates, half as
+# many independent draws, each used twice). num_steps is the number of equally spaced
+# averaging dates of an Asian option; European options are simulated in one exact step.
+# workers > 1 spreads the chunks (Sobol: the replicates) over a process pool. With the Sobol
+# sampler the draws are rounded up to replicates x a power of two.
+def mc_price(S, K, T, r, sigma, option_type="call", payoff="european", num_paths=1_000_000, num_steps=None,
+             antithetic=True, control_variate=True, chunk_size=1_000_000, seed=0, workers=1, sampler="pseudo", replicates=16):
+    if option_type not in ("call", "put"):
+        raise ValueError(f"Unknown option type: {option_type}")
+    if payoff not in PAYOFFS:
+        raise ValueError(f"Unknown payoff: {payoff}")
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler: {sampler}")
+    num_steps = max(int(round(252 * T)), 1) if num_steps is None else num_steps
+    # Keep each chunk at about chunk_size numbers whatever the number of averaging dates
+    rows = max(chunk_size // (num_steps if payoff == "asian" else 1), 1)
+    num_samples = num_paths // 2 if antithetic else num_paths
+    arguments = dict(S=S, K=K, T=T, r=r, sigma=sigma, is_call=option_type == "call", payoff=payoff, num_steps=num_steps,
+                     antithetic=antithetic, seed=seed)
+    if sampler == "sobol":
+        size = 2 ** int(np.ceil(np.log2(max(-(-num_samples // replicates), 1))))
+        # Power-of-two chunks keep every chunk boundary on a balanced stretch of the sequence
+        run = functools.partial(replicate_moments, rows=min(2 ** int(np.log2(rows)), size), size=size, **arguments)
+        indices = range(replicates)
+        num_samples = size * replicates
+    else:
+        run = functools.partial(chunk_moments, rows=rows, num_samples=num_samples, **arguments)
+        indices = range(-(-num_samples // rows))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(run, indices))
+    else:
+        partials = [run(index) for index in indices]
+
+    if not control_variate:
+        control_mean = None
+    elif payoff == "european":
+        control_mean = S
+    else:
+        control_mean = float(option_price(S, K, T, r, sigma, option_type))
+    if sampler == "sobol":
+        estimates = np.array([partial.estimate(control_mean)[0] for partial in partials])
+        price, std_error = estimates.mean(), estimates.std(ddof=1) / np.sqrt(replicates) if replicates > 1 else float("nan")
+    else:
+        moments = Moments(0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        for partial in partials:
+            moments += partial
+        price, std_error = moments.estimate(control_mean)
+    return MonteCarloResult(float(price), float(std_error), num_samples * (2 if antithetic else 1))
+
+# European prices against the closed form across strikes: {(option_type, K): (Monte Carlo
+# price, standard error, Black-Scholes price, error in standard errors)}
+def accuracy(S=100.0, T=1.0, r=0.03, sigma=0.2, strikes=(80.0, 100.0, 120.0), num_paths=1_000_000, seed=0):
+    results = {}
+    for option_type in ("call", "put"):
+        for K in strikes:
+            result = mc_price(S, K, T, r, sigma, option_type, num_paths=num_paths, seed=seed)
+            exact = float(option_price(S, K, T, r, sigma, option_type))
+            results[(option_type, K)] = (result.price, result.std_error, exact, (result.price - exact) / result.std_error)
+    return results
+
+# Time and standard error of each variance-reduction setting for an at-the-money European
+# call: {setting: (seconds, price, standard error)}
+def benchmark(S=100.0, K=100.0, T=1.0, r=0.03, sigma=0.2, num_paths=10_000_000, repeat=1):
+    settings = {"plain": (False, False), "antithetic": (True, False), "control variate": (False, True), "both": (True, True)}
+    results = {}
+    for name, (antithetic, control_variate) in settings.items():
+        run = lambda: mc_price(S, K, T, r, sigma, num_paths=num_paths, antithetic=antithetic, control_variate=control_variate)
+        seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+        result = run()
+        results[name] = (seconds, result.price, result.std_error)
+    return results
+
+# Wall time of one run against the number of worker processes (1 to the number of CPUs by
+# default), using small chunks so that every worker has several to process. Returns
+# {workers: (seconds, speed-up over one worker, price)}; the prices must all be equal.
+def scaling_benchmark(S=100.0, K=100.0, T=1.0, r=0.03, sigma=0.2, num_paths=20_000_000, chunk_size=250_000, workers=None, repeat=1):
+    workers = range(1, (os.cpu_count() or 1) + 1) if workers is None else workers
+    results = {}
+    for count in workers:
+        run = lambda: mc_price(S, K, T, r, sigma, num_paths=num_paths, chunk_size=chunk_size, workers=count)
+        seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+        results[count] = (seconds, results[1][0] / seconds if 1 in results else 1.0, run().price)
+    return results
+
+# Root-mean-square error against path count for pseudo-random and Sobol sampling, over
+# independent seeds and without antithetics or control variates so only the sampling differs.
+# European calls are compared with Black-Scholes, weekly Asian calls with a large Sobol run.
+# Returns {payoff: {sampler: ([paths], [rmse], fitted convergence order)}}.
+def convergence_benchmark(S=100.0, K=100.0, T=1.0, r=0.03, sigma=0.2, path_counts=tuple(2 ** k for k in range(10, 19, 2)),
+                          num_seeds=20, asian_steps=16):
+    references = {"european": float(option_price(S, K, T, r, sigma)),
+                  "asian": mc_price(S, K, T, r, sigma, payoff="asian", num_paths=2 ** 22, num_steps=asian_steps, sampler="sobol",
+                                    seed=10 ** 6).price}
+    results = {}
+    for payoff, reference in references.items():
+        results[payoff] = {}
+        for sampler in SAMPLERS:
+            rmse = []
+            for num_paths in path_counts:
+                prices = [mc_price(S, K, T, r, sigma, payoff=payoff, num_paths=num_paths, num_steps=asian_steps, antithetic=False,
+                                   control_variate=False, seed=seed, sampler=sampler, replicates=1).price for seed in range(num_seeds)]
+                rmse.append(float(np.sqrt(np.mean((np.array(prices) - reference) ** 2))))
+            order = -np.polyfit(np.log(path_counts), np.log(rmse), 1)[0]
+            results[payoff][sampler] = (list(path_counts), rmse, float(order))
+    return results
+
+if __name__ == "__main__":
+    exact = float(option_price(100.0, 100.0, 1.0, 0.03, 0.2))
+    print(f"at-the-money call, 10,000,000 paths (Black-Scholes {exact:.5f}):")
+    for name, (seconds, price, std_error) in benchmark().items():
+        print(f"{name:>16}: {seconds:5.2f} s  price {price:.5f}  std error {std_error:.5f}")
+    for (option_type, K), (price, std_error, exact, z) in accuracy().items():
+        print(f"{option_type:>4} K={K:5.1f}: Monte Carlo {price:.5f} ± {std_error:.5f}, Black-Scholes {exact:.5f} ({z:+.2f} std errors)")
+    asian = mc_price(100.0, 100.0, 1.0, 0.03, 0.2, payoff="asian", num_paths=200_000, num_steps=52, control_variate=False)
+    controlled = mc_price(100.0, 100.0, 1.0, 0.03, 0.2, payoff="asian", num_paths=200_000, num_steps=52)
+    print(f"weekly Asian call, 200,000 paths: {asian.price:.5f} ± {asian.std_error:.5f} antithetic only, "
+          f"{controlled.price:.5f} ± {controlled.std_error:.5f} with the European control")
+    scaling = scaling_benchmark(workers=sorted({1, 2, os.cpu_count() or 1}))
+    for count, (seconds, speedup, price) in scaling.items():
+        print(f"{count:>3} worker(s): 20,000,000 paths in {seconds:5.2f} s, speed-up {speedup:4.2f}x, price {price!r}")
+    print("identical prices for every worker count:", len({price for _, _, price in scaling.values()}) == 1)
+    for payoff, samplers in convergence_benchmark().items():
+        for sampler, (path_counts, rmse, order) in samplers.items():
+            print(f"{payoff:>8} {sampler:>6}: rmse " + " ".join(f"{error:.1e}" for error in rmse)
+                  + f" over {path_counts[0]:,}..{path_counts[-1]:,} paths, error ~ N^-{order:.2f}")
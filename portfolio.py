@@ -0,0 +1,177 @@
+# portfolio.py
+# A portfolio of any number of strategies and option positions on one underlying. Legs
+# are stored column-wise (one row per leg, tagged with the position it belongs to) and
+# identical legs are netted: every distinct (kind, strike, expiry) becomes one instrument,
+# priced once per scenario with a single vectorized all_greeks call, and the per-unit
+# results are scattered back through a sparse positions x instruments exposure matrix.
+# Position-level and book-level P&L and Greeks therefore cost one kernel call over the
+# unique instruments plus one sparse product, however many legs repeat.
+#
+# Underlying legs are netted into a single instrument whatever their entry price: the
+# entry price is carried as the leg's premium (cost basis), so P&L is always
+# weight * (value - premium) and the underlying's value is simply the spot.
+import timeit
+import numpy as np
+from scipy import sparse
+from black_scholes import all_greeks, as_precision
+from strategies import Leg, Strategy, SIDES
+
+KINDS = ("call", "put", "underlying")
+FIELDS = ("Value", "P&L", "Delta", "Gamma", "Vega", "Rho", "Theta")
+
+class Portfolio:
+    __slots__ = ("names", "position", "kind", "strikes", "expiries", "weights", "premiums",
+                 "instrument", "instrument_kind", "instrument_strikes", "instrument_expiries", "exposure", "cost")
+
+    # One row per leg: position index into names, kind index into KINDS, strike, expiry,
+    # signed quantity and premium paid per unit (entry price for underlying legs)
+    def __init__(self, names, position, kind, strikes, expiries, weights, premiums):
+        self.names = tuple(names)
+        columns = np.broadcast_arrays(np.asarray(position, dtype=np.int64), np.asarray(kind, dtype=np.int64),
+                                      *(np.asarray(x, dtype=float) for x in (strikes, expiries, weights, premiums)))
+        columns = [np.array(column).ravel() for column in columns]
+        self.position, self.kind, self.strikes, self.expiries, self.weights, self.premiums = columns
+        if self.position.size and (self.position.min() < 0 or self.position.max() >= len(self.names)):
+            raise ValueError("Leg positions must index into names")
+        if self.kind.size and (self.kind.min() < 0 or self.kind.max() >= len(KINDS)):
+            raise ValueError(f"Leg kinds must index into {KINDS}")
+
+        # Net identical legs; the underlying has no strike or expiry of its own
+        is_underlying = self.kind == KINDS.index("underlying")
+        keys = (self.kind, np.where(is_underlying, 0.0, self.strikes), np.where(is_underlying, 0.0, self.expiries))
+        order = np.lexsort(keys[::-1])
+        sorted_keys = [key[order] for key in keys]
+        starts = np.ones(order.size, dtype=bool)
+        starts[1:] = np.any([key[1:] != key[:-1] for key in sorted_keys], axis=0)
+        self.instrument = np.empty(order.size, dtype=np.int64)
+        self.instrument[order] = np.cumsum(starts) - 1
+        self.instrument_kind, self.instrument_strikes, self.instrument_expiries = (key[starts] for key in sorted_keys)
+
+        # Net quantity of every instrument in every position, and the premium each position paid
+        self.exposure = sparse.csr_matrix((self.weights, (self.position, self.instrument)), shape=(len(self.names), self.instrument_kind.size))
+        self.cost = np.bincount(self.position, weights=self.weights * self.premiums, minlength=len(self.names))
+        for array in (*columns, self.instrument, self.instrument_kind, self.instrument_strikes, self.instrument_expiries, self.cost):
+            array.setflags(write=False)
+
+    @classmethod
+    def from_strategies(cls, positions):
+        # positions: (strategy, T) or (strategy, T, units) per position
+        positions = [tuple(position) + (1.0,) * (3 - len(position)) for position in positions]
+        names = [strategy.name for strategy, _, _ in positions]
+        rows = [(index, KINDS.index(leg.kind), leg.strike, T, units * SIDES[leg.side] * leg.quantity,
+                 leg.strike if leg.kind == "underlying" else leg.premium)
+                for index, (strategy, T, units) in enumerate(positions) for leg in strategy.legs]
+        return cls(names, *(zip(*rows) if rows else ([],) * 6))
+
+    # A ContractBook as a single position (strike, expiry, quantity and purchase price per row)
+    @classmethod
+    def from_book(cls, book, name="Book"):
+        kind = np.where(book.is_call, KINDS.index("call"), KINDS.index("put"))
+        return cls([name], 0, kind, book.K, book.T, book.quantity, book.purchase_price)
+
+    @property
+    def num_legs(self):
+        return self.position.size
+
+    @property
+    def num_instruments(self):
+        return self.instrument_kind.size
+
+    # Legs of one position, e.g. to draw it with the single-strategy charts
+    def strategy(self, index):
+        rows = np.flatnonzero(self.position == index)
+        legs = [Leg(KINDS[self.kind[row]], float(self.premiums[row] if KINDS[self.kind[row]] == "underlying" else self.strikes[row]),
+                    abs(float(self.weights[row])), "long" if self.weights[row] >= 0 else "short", float(self.premiums[row]))
+                for row in rows]
+        return Strategy(self.names[index], legs)
+
+# One portfolio holding every position of the given portfolios, in order
+def combine(*portfolios):
+    offsets = np.cumsum([0] + [len(portfolio.names) for portfolio in portfolios[:-1]])
+    return Portfolio([name for portfolio in portfolios for name in portfolio.names],
+                     np.concatenate([portfolio.position + offset for portfolio, offset in zip(portfolios, offsets)]),
+                     *(np.concatenate([getattr(portfolio, column) for portfolio in portfolios])
+                       for column in ("kind", "strikes", "expiries", "weights", "premiums")))
+
+# Per-unit value and Greeks of options and underlying rows given by kind, strike and expiry
+# columns; S and sigma broadcast against them. precision is the kernel's working precision
+# (see black_scholes.py): float32 suits the scenario grids behind the charts, not P&L accounting.
+def per_unit_values(kind, strikes, expiries, S, r, sigma, precision="float64"):
+    is_call, is_underlying = kind == KINDS.index("call"), kind == KINDS.index("underlying")
+    # The underlying's rows are priced at a dummy strike and expiry and overwritten below
+    greeks = all_greeks(S, np.where(is_underlying, 1.0, strikes), np.where(is_underlying, 1.0, expiries), r, sigma, precision)
+    zero = np.zeros(greeks.gamma.shape)
+    return {
+        "Value": np.where(is_underlying, S, np.where(is_call, greeks.call_price, greeks.put_price)),
+        "Delta": np.where(is_underlying, 1.0, np.where(is_call, greeks.call_delta, greeks.put_delta)),
+        "Gamma": np.where(is_underlying, zero, greeks.gamma),
+        "Vega": np.where(is_underlying, zero, greeks.vega),
+        "Rho": np.where(is_underlying, zero, np.where(is_call, greeks.call_rho, greeks.put_rho)),
+        "Theta": np.where(is_underlying, zero, np.where(is_call, greeks.call_theta, greeks.put_theta))
+    }
+
+# Per-unit value and Greeks of every instrument, each of shape scenario shape + (instruments,).
+# S and sigma may be scalars or arrays of scenarios (broadcast together).
+def instrument_values(portfolio, S, r, sigma, precision="float64"):
+    S, sigma = np.broadcast_arrays(as_precision(S, precision), as_precision(sigma, precision))
+    return per_unit_values(portfolio.instrument_kind, portfolio.instrument_strikes, portfolio.instrument_expiries,
+                           S[..., np.newaxis], r, sigma[..., np.newaxis], precision)
+
+# Value, P&L and Greeks of every position: {field: array of scenario shape + (positions,)}
+def position_values(portfolio, S, r, sigma, precision="float64"):
+    values = instrument_values(portfolio, S, r, sigma, precision)
+    totals = {}
+    for field, per_unit in values.items():
+        flat = per_unit.reshape(-1, portfolio.num_instruments)
+        totals[field] = (portfolio.exposure @ flat.T).T.reshape(per_unit.shape[:-1] + (len(portfolio.names),))
+    totals["P&L"] = totals["Value"] - portfolio.cost
+    return {field: totals[field] for field in FIELDS}
+
+# Value, P&L and Greeks of the whole book: {field: scalar or array of scenario shape}
+def book_values(portfolio, S, r, sigma, precision="float64"):
+    net = as_precision(np.asarray(portfolio.exposure.sum(axis=0)).ravel(), precision)
+    totals = {field: per_unit @ net for field, per_unit in instrument_values(portfolio, S, r, sigma, precision).items()}
+    totals["P&L"] = totals["Value"] - float(portfolio.cost.sum())
+    return {field: totals[field] for field in FIELDS}
+
+# Same results without netting: every leg priced on its own (the reference for the benchmark)
+def unnetted_position_values(portfolio, S, r, sigma):
+    per_leg = per_unit_values(portfolio.kind, portfolio.strikes, portfolio.expiries, S, r, sigma)
+    totals = {field: np.bincount(portfolio.position, weights=portfolio.weights * values, minlength=len(portfolio.names))
+              for field, values in per_leg.items()}
+    totals["P&L"] = totals["Value"] - portfolio.cost
+    return {field: totals[field] for field in FIELDS}
+
+# Random book of vertical spreads and straddles on a listed strike x expiry grid
+def random_portfolio(num_positions, S=100.0, num_strikes=41, expiries=(0.08, 0.25, 0.5, 1.0), seed=0):
+    rng = np.random.default_rng(seed)
+    strikes = np.linspace(0.6 * S, 1.4 * S, num_strikes)
+    positions = []
+    for index in range(num_positions):
+        T = float(rng.choice(expiries))
+        lower, upper = np.sort(rng.choice(strikes, 2, replace=False))
+        side = str(rng.choice(("long", "short")))
+        if index % 2:
+            legs = [Leg("call", float(lower), 1, side, 5.0), Leg("call", float(upper), 1, "short" if side == "long" else "long", 2.0)]
+        else:
+            legs = [Leg("call", float(lower), 1, side, 4.0), Leg("put", float(lower), 1, side, 3.0), Leg("underlying", S, 0.5, "long", 0.0)]
+        positions.append((Strategy(f"Position {index}", legs), T, float(rng.integers(1, 10))))
+    return Portfolio.from_strategies(positions)
+
+# Time position-level pricing with and without netting. Returns
+# {num_positions: (legs, instruments, netted seconds, unnetted seconds, max abs difference)}.
+def benchmark(sizes=(1_000, 10_000, 30_000), S=100.0, r=0.03, sigma=0.25, repeat=3):
+    results = {}
+    for size in sizes:
+        portfolio = random_portfolio(size, S)
+        netted = min(timeit.repeat(lambda: position_values(portfolio, S, r, sigma), number=1, repeat=repeat))
+        unnetted = min(timeit.repeat(lambda: unnetted_position_values(portfolio, S, r, sigma), number=1, repeat=repeat))
+        reference = unnetted_position_values(portfolio, S, r, sigma)
+        difference = max(float(np.max(np.abs(values - reference[field]))) for field, values in position_values(portfolio, S, r, sigma).items())
+        results[size] = (portfolio.num_legs, portfolio.num_instruments, netted, unnetted, difference)
+    return results
+
+if __name__ == "__main__":
+    for size, (legs, instruments, netted, unnetted, difference) in benchmark().items():
+        print(f"{size:>6,} positions, {legs:>6,} legs -> {instruments:>4,} instruments: netted {netted * 1e3:7.2f} ms, "
+              f"every leg priced {unnetted * 1e3:7.2f} ms, max difference {difference:.1e}")
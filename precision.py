@@ -0,0 +1,79 @@
+# precision.py
+# Accuracy budget and benchmark for the float32 mode of the vectorized kernels
+# (precision="float32" on call_price, put_price, option_profit, all_greeks and the grid
+# generators built on them).
+#
+# Accuracy budget: over S in [1, 1000], ln(K / S) in [-1, 1], T in [0.01, 5], r in [0, 0.1]
+# and sigma in [0.02, 1.5], float32 results differ from float64 by at most
+#     prices               2e-6 * S
+#     vega, rho, theta     2e-7 * S     (per 1%, as everywhere else)
+#     deltas               1e-5
+#     gamma                2e-3 / S
+# Measured worst cases on 2M random contracts are about a third of these. Prices are
+# therefore good to a few cents on a $10,000 notional, which is far below display
+# precision on the heatmaps, but float32 is not suitable for P&L accounting or for
+# feeding implied volatility inversion.
+import timeit
+import tracemalloc
+import numpy as np
+from black_scholes import all_greeks
+
+# Budget per Greeks field as (tolerance, power of S the tolerance scales with)
+PRECISION_BUDGET = {
+    "call_price": (2e-6, 1), "put_price": (2e-6, 1),
+    "call_delta": (1e-5, 0), "put_delta": (1e-5, 0),
+    "gamma": (2e-3, -1),
+    "vega": (2e-7, 1),
+    "call_rho": (2e-7, 1), "put_rho": (2e-7, 1),
+    "call_theta": (2e-7, 1), "put_theta": (2e-7, 1)
+}
+
+def random_contracts(size, seed=0):
+    rng = np.random.default_rng(seed)
+    S = rng.uniform(1, 1000, size)
+    K = S * np.exp(rng.uniform(-1, 1, size))
+    return S, K, rng.uniform(0.01, 5, size), rng.uniform(0, 0.1, size), rng.uniform(0.02, 1.5, size)
+
+# Accuracy harness: compare float32 against float64 across the budget domain.
+# Returns the worst error of each field as a fraction of its budget; raises if any exceeds 1.
+def check_precision(size=1_000_000, seed=0):
+    S, K, T, r, sigma = random_contracts(size, seed)
+    reference = all_greeks(S, K, T, r, sigma)
+    single = all_greeks(S, K, T, r, sigma, precision="float32")
+
+    usage = {}
+    for field in reference._fields:
+        tolerance, power = PRECISION_BUDGET[field]
+        error = np.abs(getattr(single, field).astype(float) - getattr(reference, field))
+        usage[field] = float(np.max(error / (tolerance * S ** power)))
+
+    over = {field: used for field, used in usage.items() if used > 1}
+    if over:
+        raise AssertionError(f"float32 results exceed the accuracy budget: {over}")
+    return usage
+
+# Throughput and peak memory of all_greeks in each precision.
+# Returns {size: {precision: (seconds per call, peak bytes allocated)}}.
+def benchmark(sizes=(100_000, 1_000_000, 4_000_000), repeat=3):
+    results = {}
+    for size in sizes:
+        S, K, T, r, sigma = random_contracts(size)
+        results[size] = {}
+        for precision in ("float64", "float32"):
+            # Inputs are converted up front so the timing covers the kernel, not the cast
+            inputs = [np.asarray(x, dtype=precision) for x in (S, K, T, r, sigma)]
+            seconds = min(timeit.repeat(lambda: all_greeks(*inputs, precision=precision), number=1, repeat=repeat))
+            tracemalloc.start()
+            all_greeks(*inputs, precision=precision)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[size][precision] = (seconds, peak)
+    return results
+
+if __name__ == "__main__":
+    for field, used in check_precision().items():
+        print(f"{field:>10}: {used:6.1%} of budget")
+    for size, runs in benchmark().items():
+        (time64, peak64), (time32, peak32) = runs["float64"], runs["float32"]
+        print(f"n={size:>9,}: float64 {time64 * 1e3:8.1f} ms {peak64 / 2**20:7.1f} MiB | "
+              f"float32 {time32 * 1e3:8.1f} ms {peak32 / 2**20:7.1f} MiB | {time64 / time32:4.2f}x faster, {peak64 / peak32:4.2f}x less memory")
@@ -0,0 +1,85 @@
+# pricing_cache.py
+# Process-wide memoization for scalar pricing calls. Streamlit re-runs main.py on every
+# widget interaction and keeps one Python process for all sessions, so the sidebar
+# defaults, strategy leg prices and hedge Greeks are mostly repeat work. Keys are the
+# function name plus the inputs rounded to a fixed number of decimals; the store is a
+# bounded LRU guarded by a lock because sessions run on separate threads. An optional
+# ttl (seconds) also expires entries by age.
+import functools
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+class PricingCache:
+    def __init__(self, capacity=4096, decimals=10, ttl=None):
+        self.capacity = capacity
+        self.decimals = decimals
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, name, args):
+        return (name,) + tuple(arg if isinstance(arg, str) else round(float(arg), self.decimals) for arg in args)
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                value, stored_at = self.entries[key]
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        value = compute()
+
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    # Only calls made entirely of numbers and strings are cached; anything else (arrays,
+    # model objects) goes straight to the wrapped function
+    def memoize(self, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            values = args + tuple(kwargs[name] for name in sorted(kwargs))
+            if not all(isinstance(value, (float, int, str, np.number)) for value in values):
+                return function(*args, **kwargs)
+            key = self.make_key(f"{function.__module__}.{function.__qualname__}", values) + tuple(sorted(kwargs))
+            return self.get_or_compute(key, lambda: function(*args, **kwargs))
+        wrapper.uncached = function
+        return wrapper
+
+    def resize(self, capacity):
+        with self.lock:
+            self.capacity = capacity
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
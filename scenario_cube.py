@@ -0,0 +1,104 @@
+# scenario_cube.py
+# Scenario cube: a strategy's P&L (or Greeks) evaluated once over the full 4-D lattice
+# spot x vol x time to expiry x rate in a single broadcast pass. Heatmaps, surfaces and
+# line charts then read 2-D or 1-D slices out of the cube. Slicing fixes the other axes
+# with integer indices and transposes, and both of those return NumPy views, so changing
+# which two axes are plotted (or where the others are pinned) costs no recomputation and
+# no copy. Cubes are read-only so a cached cube can be shared between reruns and sessions.
+#
+# Time to expiry must be positive on the lattice; the expiry payoff itself lives in
+# strategies.expiry_payoff.
+import numpy as np
+from black_scholes import all_greeks, as_precision
+from strategies import scenario_profit
+
+AXES = ("spot", "vol", "T", "rate")
+AXIS_LABELS = {"spot": "Spot Price", "vol": "Volatility", "T": "Time to Expiry", "rate": "Risk-Free Rate"}
+
+class ScenarioCube:
+    __slots__ = ("name", "axes", "values")
+
+    # axes maps each name in AXES to its 1-D coordinates; values has shape (spot, vol, T, rate)
+    def __init__(self, name, axes, values):
+        self.name = name
+        self.axes = {axis: np.array(axes[axis], dtype=float).ravel() for axis in AXES}
+        self.values = np.asarray(values)
+        if self.values.shape != tuple(self.axes[axis].size for axis in AXES):
+            raise ValueError(f"Cube values of shape {self.values.shape} do not match the axes")
+        for array in (self.values, *self.axes.values()):
+            array.setflags(write=False)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    # Index of the lattice point nearest to value along axis
+    def index(self, axis, value):
+        return int(np.argmin(np.abs(self.axes[axis] - value)))
+
+    # Integer index for every axis not being plotted. Pinned axes are given by value (nearest
+    # lattice point, e.g. T=0.5); any axis left out is pinned at its first point.
+    def pins(self, free, fixed):
+        unknown = set(fixed) - set(AXES)
+        if unknown:
+            raise ValueError(f"Unknown axes: {sorted(unknown)}")
+        return tuple(slice(None) if axis in free else self.index(axis, fixed.get(axis, self.axes[axis][0])) for axis in AXES)
+
+    # 2-D view with rows along one axis and columns along another, e.g.
+    # cube.view("vol", "spot", T=0.25) -> (grid, vol coordinates, spot coordinates)
+    def view(self, rows, columns, **fixed):
+        if rows not in AXES or columns not in AXES or rows == columns:
+            raise ValueError(f"Rows and columns must be two different axes out of {AXES}")
+        grid = self.values[self.pins((rows, columns), fixed)]
+        if AXES.index(rows) > AXES.index(columns):
+            grid = grid.T
+        return grid, self.axes[rows], self.axes[columns]
+
+    # 1-D view along one axis, e.g. cube.line("spot", vol=0.2, T=0.5) -> (values, spot coordinates)
+    def line(self, axis, **fixed):
+        if axis not in AXES:
+            raise ValueError(f"Unknown axis: {axis}")
+        return self.values[self.pins((axis,), fixed)], self.axes[axis]
+
+# The four coordinate arrays reshaped to (n, 1, 1, 1), (1, n, 1, 1), ... so they broadcast
+# to the full lattice without materializing it
+def lattice(spot, vol, T, r):
+    coordinates = [np.atleast_1d(np.asarray(x, dtype=float)).ravel() for x in (spot, vol, T, r)]
+    return [x.reshape([-1 if axis == position else 1 for axis in range(len(AXES))]) for position, x in enumerate(coordinates)]
+
+def axes_dict(spot, vol, T, r):
+    return dict(zip(AXES, (np.atleast_1d(np.asarray(x, dtype=float)) for x in (spot, vol, T, r))))
+
+# P&L of a strategy over the lattice (valuation, model and precision as in
+# strategies.scenario_profit); a float32 cube takes half the memory
+def strategy_cube(strategy, spot, vol, T, r, valuation="hold_to_expiry", model="black_scholes", precision="float64"):
+    spot_axis, vol_axis, T_axis, r_axis = lattice(spot, vol, T, r)
+    profits = scenario_profit(strategy, spot_axis, vol_axis, T_axis, r_axis, valuation, model, precision)
+    profits = np.broadcast_to(profits, tuple(x.size for x in (spot_axis, vol_axis, T_axis, r_axis)))
+    return ScenarioCube(strategy.name, axes_dict(spot, vol, T, r), np.ascontiguousarray(profits))
+
+# Position Greeks of a strategy over the lattice, keyed like strategies.strategy_greeks.
+# One all_greeks call covers every leg and every scenario; an underlying leg only adds delta.
+def greek_cubes(strategy, spot, vol, T, r, precision="float64"):
+    spot_axis, vol_axis, T_axis, r_axis = lattice(spot, vol, T, r)
+    ndim = len(AXES)
+    K = strategy.per_leg(strategy.strikes, ndim)
+    is_call = strategy.per_leg(strategy.is_call, ndim)
+    weights = as_precision(strategy.per_leg(np.where(strategy.is_underlying, 0.0, strategy.signs * strategy.quantities), ndim), precision)
+    stock_delta = float(np.sum(np.where(strategy.is_underlying, strategy.signs * strategy.quantities, 0.0)))
+
+    greeks = all_greeks(spot_axis, K, T_axis, r_axis, vol_axis, precision)
+    shape = tuple(x.size for x in (spot_axis, vol_axis, T_axis, r_axis))
+    fields = {
+        "Delta": np.where(is_call, greeks.call_delta, greeks.put_delta),
+        "Gamma": greeks.gamma,
+        "Vega": greeks.vega,
+        "Rho": np.where(is_call, greeks.call_rho, greeks.put_rho),
+        "Theta": np.where(is_call, greeks.call_theta, greeks.put_theta)
+    }
+    axes = axes_dict(spot, vol, T, r)
+    cubes = {}
+    for greek, values in fields.items():
+        total = np.sum(weights * values, axis=0) + (stock_delta if greek == "Delta" else 0.0)
+        cubes[greek] = ScenarioCube(f"{strategy.name} {greek}", axes, np.ascontiguousarray(np.broadcast_to(total, shape)))
+    return cubes
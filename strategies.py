@@ -0,0 +1,180 @@
+# strategies.py
+# Declarative multi-leg option strategies. A strategy is a list of legs (call, put or
+# underlying, with strike, quantity, side and premium); the legs are stacked along a
+# leading axis so P&L over a whole spot x vol grid, and the position Greeks, come out
+# of one broadcast computation however many legs there are. Pages only list the legs.
+from collections import namedtuple
+import numpy as np
+from black_scholes import all_greeks, as_precision, call_price, put_price
+from lattice import lattice_price
+from finite_difference import fd_price
+
+SIDES = {"long": 1.0, "short": -1.0}
+MODELS = ("black_scholes", "american", "finite_difference")
+
+# For an underlying leg, strike is the entry price and premium is ignored
+class Leg(namedtuple("Leg", ["kind", "strike", "quantity", "side", "premium"], defaults=(1.0, "long", 0.0))):
+    __slots__ = ()
+
+class Strategy:
+    __slots__ = ("name", "legs", "is_call", "is_put", "is_underlying", "strikes", "quantities", "signs", "premiums")
+
+    def __init__(self, name, legs):
+        self.name = name
+        self.legs = tuple(Leg(*leg) for leg in legs)
+        for leg in self.legs:
+            if leg.kind not in ("call", "put", "underlying"):
+                raise ValueError(f"Unknown leg kind: {leg.kind}")
+            if leg.side not in SIDES:
+                raise ValueError(f"Unknown side: {leg.side}")
+
+        kinds = np.array([leg.kind for leg in self.legs])
+        self.is_call = kinds == "call"
+        self.is_put = kinds == "put"
+        self.is_underlying = kinds == "underlying"
+        self.strikes = np.array([leg.strike for leg in self.legs], dtype=float)
+        self.quantities = np.array([leg.quantity for leg in self.legs], dtype=float)
+        self.signs = np.array([SIDES[leg.side] for leg in self.legs])
+        self.premiums = np.array([leg.premium for leg in self.legs], dtype=float)
+
+    # Reshape a per-leg column to (legs, 1, ..., 1) so it broadcasts against an ndim-d grid
+    def per_leg(self, column, ndim):
+        return column.reshape((-1,) + (1,) * ndim)
+
+def intrinsic_values(strategy, spot, precision="float64"):
+    spot = as_precision(spot, precision)
+    K = as_precision(strategy.per_leg(strategy.strikes, spot.ndim), precision)
+    is_call = strategy.per_leg(strategy.is_call, spot.ndim)
+    return np.where(is_call, np.maximum(spot - K, 0), np.maximum(K - spot, 0))
+
+# Per-unit profit of each leg at expiry, signed by side: shape (legs,) + spot.shape
+def expiry_leg_profits(strategy, spot):
+    spot = np.asarray(spot, dtype=float)
+    ndim = spot.ndim
+    option_profit = strategy.per_leg(strategy.signs, ndim) * (intrinsic_values(strategy, spot) - strategy.per_leg(strategy.premiums, ndim))
+    stock_profit = strategy.per_leg(strategy.signs, ndim) * (spot - strategy.per_leg(strategy.strikes, ndim))
+    return np.where(strategy.per_leg(strategy.is_underlying, ndim), stock_profit, option_profit)
+
+def expiry_profit(strategy, spot):
+    spot = np.asarray(spot, dtype=float)
+    return np.sum(strategy.per_leg(strategy.quantities, spot.ndim) * expiry_leg_profits(strategy, spot), axis=0)
+
+# Expiry profit as an exact piecewise-linear function of spot on [0, inf). kinks starts at 0
+# and holds the distinct strikes; values[j] is the profit at kinks[j] and slopes[j] the slope
+# from kinks[j] up to the next kink (the last slope runs to infinity).
+class ExpiryPayoff(namedtuple("ExpiryPayoff", ["kinks", "values", "slopes"])):
+    __slots__ = ()
+
+    def __call__(self, spot):
+        spot = np.asarray(spot, dtype=float)
+        beyond = self.values[-1] + self.slopes[-1] * (spot - self.kinks[-1])
+        return np.where(spot > self.kinks[-1], beyond, np.interp(spot, self.kinks, self.values))
+
+    # Spots where the profit crosses (or touches) zero, solved exactly on each linear piece
+    def breakevens(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            roots = self.kinks - self.values / self.slopes
+        upper = np.append(self.kinks[1:], np.inf)
+        found = (self.slopes != 0) & (roots > self.kinks) & (roots <= upper)
+        points = roots[found]
+        if self.values[0] == 0:
+            points = np.append(points, 0.0)
+        return np.unique(points)
+
+    def max_profit(self):
+        return np.inf if self.slopes[-1] > 0 else float(np.max(self.values))
+
+    def max_loss(self):
+        return -np.inf if self.slopes[-1] < 0 else float(np.min(self.values))
+
+    # (start, end, slope) for every linear piece
+    def slope_regions(self):
+        ends = np.append(self.kinks[1:], np.inf)
+        return [(float(start), float(end), float(slope)) for start, end, slope in zip(self.kinks, ends, self.slopes)]
+
+    # The chart vertices between spot_min and spot_max: the end points plus every kink in between.
+    # Joining them with straight lines draws the payoff exactly at any resolution.
+    def vertices(self, spot_min, spot_max):
+        inner = self.kinks[(self.kinks > spot_min) & (self.kinks < spot_max)]
+        spot = np.concatenate(([spot_min], inner, [spot_max]))
+        return spot, self(spot)
+
+# Built in O(legs log legs): every option leg steps the slope up by its signed quantity at its
+# strike (puts start at -weight, calls at 0), and the values follow by integrating the slopes.
+def expiry_payoff(strategy):
+    weights = strategy.signs * strategy.quantities
+    is_option = ~strategy.is_underlying
+    kinks = np.unique(np.append(strategy.strikes[is_option], 0.0))
+
+    steps = np.zeros(kinks.size)
+    np.add.at(steps, np.searchsorted(kinks, strategy.strikes[is_option]), weights[is_option])
+    slopes = np.sum(weights[strategy.is_underlying]) - np.sum(weights[strategy.is_put]) + np.cumsum(steps)
+
+    start = float(expiry_profit(strategy, 0.0))
+    values = start + np.concatenate(([0.0], np.cumsum(slopes[:-1] * np.diff(kinks))))
+    return ExpiryPayoff(kinks, values, slopes)
+
+# Per-unit expiry payoff of each leg on its own, signed by side (the dashed lines on the charts)
+def leg_payoffs(strategy):
+    return [expiry_payoff(Strategy(strategy.name, [leg._replace(quantity=1.0)])) for leg in strategy.legs]
+
+# Option prices (S, K, T, r, sigma and is_call broadcast together) under a pricing model:
+#   "black_scholes"     - closed-form European prices
+#   "american"          - binomial tree with early exercise (see lattice.py)
+#   "finite_difference" - Crank-Nicolson with early exercise, one PDE solve per distinct
+#                         contract covering every spot (see finite_difference.py)
+# precision is the working precision of the closed form; the tree and the PDE always run in
+# float64 and their prices are returned in the requested precision.
+def model_price(S, K, T, r, sigma, is_call, model="black_scholes", precision="float64"):
+    if model == "black_scholes":
+        return np.where(is_call, call_price(S, K, T, r, sigma, precision), put_price(S, K, T, r, sigma, precision))
+    elif model == "american":
+        return as_precision(lattice_price(S, K, T, r, sigma, is_call), precision)
+    elif model == "finite_difference":
+        return as_precision(fd_price(S, K, T, r, sigma, is_call, american=True).price, precision)
+    raise ValueError(f"Unknown model: {model}")
+
+# Profit of the whole strategy over a grid of scenarios (spot and vol broadcast together).
+# Option legs are valued with Black-Scholes at each scenario, in one of two ways:
+#   "hold_to_expiry" - enter at the model price in that scenario and hold to expiry at that spot
+#   "mark_to_market" - model price less the premium paid, floored at losing the premium
+# Underlying legs always contribute (spot - entry price). model picks how the option legs
+# are priced (see model_price); every array of the calculation is held in precision.
+def scenario_profit(strategy, spot, vol, T, r, valuation="hold_to_expiry", model="black_scholes", precision="float64"):
+    spot, vol = np.broadcast_arrays(as_precision(spot, precision), as_precision(vol, precision))
+    T, r = as_precision(T, precision), as_precision(r, precision)
+    ndim = spot.ndim
+    K = as_precision(strategy.per_leg(strategy.strikes, ndim), precision)
+    is_call = strategy.per_leg(strategy.is_call, ndim)
+    prices = model_price(spot, K, T, r, vol, is_call, model, precision)
+
+    if valuation == "hold_to_expiry":
+        option_profit = intrinsic_values(strategy, spot, precision) - prices
+    elif valuation == "mark_to_market":
+        premiums = as_precision(strategy.per_leg(strategy.premiums, ndim), precision)
+        option_profit = np.maximum(prices - premiums, -premiums)
+    else:
+        raise ValueError(f"Unknown valuation: {valuation}")
+
+    leg_profits = np.where(strategy.per_leg(strategy.is_underlying, ndim), spot - K, option_profit)
+    weights = as_precision(strategy.per_leg(strategy.signs * strategy.quantities, ndim), precision)
+    return np.sum(weights * leg_profits, axis=0)
+
+# Position Greeks: signed, quantity-weighted sum over legs. An underlying leg only adds delta.
+def strategy_greeks(strategy, S, T, r, sigma):
+    greeks = all_greeks(S, strategy.strikes, T, r, sigma)
+    weights = np.where(strategy.is_underlying, 0.0, strategy.signs * strategy.quantities)
+    stock_delta = np.sum(np.where(strategy.is_underlying, strategy.signs * strategy.quantities, 0.0))
+    is_call = strategy.is_call
+    return {
+        "Delta": float(np.dot(weights, np.where(is_call, greeks.call_delta, greeks.put_delta)) + stock_delta),
+        "Gamma": float(np.dot(weights, greeks.gamma)),
+        "Vega": float(np.dot(weights, greeks.vega)),
+        "Rho": float(np.dot(weights, np.where(is_call, greeks.call_rho, greeks.put_rho))),
+        "Theta": float(np.dot(weights, np.where(is_call, greeks.call_theta, greeks.put_theta)))
+    }
+
+# Net premium paid to open the option legs (negative for a net credit)
+def net_premium(strategy):
+    weights = np.where(strategy.is_underlying, 0.0, strategy.signs * strategy.quantities)
+    return float(np.dot(weights, strategy.premiums))
@@ -0,0 +1,87 @@
+# strategy_plots.py
+# Shared figures for the strategy pages: the spot x vol profit heatmap (a slice of the
+# strategy's scenario cube) and the expiry profit chart, both drawn from a Strategy.
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+from adaptive_grid import DenseGrid, adaptive_grid
+from scenario_cube import AXIS_LABELS, strategy_cube
+from strategies import expiry_payoff, leg_payoffs, scenario_profit
+
+# Grid behind a high-resolution heatmap: the closed form prices the display grid directly,
+# the slower models refine near strikes and breakevens (see adaptive_grid.py), the PDE
+# solving each vol row once for every spot on it
+def model_grid(profit, spot_range, vol_range, model="black_scholes"):
+    if model == "black_scholes":
+        return DenseGrid(profit, spot_range, vol_range)
+    return adaptive_grid(profit, spot_range, vol_range, whole_rows=model == "finite_difference")
+
+# resolution is "standard" (annotated 10 x 10 slice of the scenario cube) or "adaptive"
+# (see model_grid)
+def strategy_heatmap(strategy, T, r, spot_min, spot_max, vol_min, vol_max, title, valuation="hold_to_expiry", resolution="standard", model="black_scholes", precision="float64"):
+    if resolution == "adaptive":
+        profit = lambda spot, vol: scenario_profit(strategy, spot, vol, T, r, valuation, model, precision)
+        return adaptive_heatmap(model_grid(profit, (spot_min, spot_max), (vol_min, vol_max), model), title)
+    if resolution != "standard":
+        raise ValueError(f"Unknown resolution: {resolution}")
+    cube = strategy_cube(strategy, np.linspace(spot_min, spot_max, 10), np.linspace(vol_min, vol_max, 10), T, r, valuation, model, precision)
+    return cube_heatmap(cube, "vol", "spot", title)
+
+# Heatmap of any two axes of a scenario cube, the remaining axes pinned by value (see
+# ScenarioCube.view). The grid is a view into the cube, so nothing is re-priced.
+def cube_heatmap(cube, rows, columns, title, **fixed):
+    grid, row_values, column_values = cube.view(rows, columns, **fixed)
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(grid[::-1], xticklabels=np.round(column_values, 2), yticklabels=np.round(row_values[::-1], 2), annot=True, fmt=".2f", cmap="RdYlGn", ax=ax, center=0)
+    ax.set_title(title)
+    ax.set_xlabel(AXIS_LABELS[columns])
+    ax.set_ylabel(AXIS_LABELS[rows])
+    return fig
+
+# Unannotated heatmap of an adaptive or dense grid on its 200 x 200 display grid, with 10
+# ticks per axis
+def adaptive_heatmap(grid, title, xlabel='Spot Price', ylabel='Volatility', ticks=10):
+    values, x, y = grid.resample()
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(values[::-1], xticklabels=False, yticklabels=False, cmap="RdYlGn", ax=ax, center=0)
+    columns = np.linspace(0, x.size - 1, ticks).round().astype(int)
+    rows = np.linspace(0, y.size - 1, ticks).round().astype(int)
+    ax.set_xticks(columns + 0.5)
+    ax.set_xticklabels(np.round(x[columns], 2), rotation=90)
+    ax.set_yticks(rows + 0.5)
+    ax.set_yticklabels(np.round(y[::-1][rows], 2), rotation=0)
+    ax.set_title(f"{title} ({grid.description})")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    return fig
+
+# leg_lines gives a (label, format string) per leg, in leg order; strike_lines is a list of
+# (strike, color, label) vertical markers. Lines are drawn through the exact payoff vertices.
+def strategy_payoff_chart(strategy, spot_min, spot_max, title, total_label, leg_lines, strike_lines, total_color='green', figsize=(10, 8)):
+    payoff = expiry_payoff(strategy)
+
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.plot(*payoff.vertices(spot_min, spot_max), label=total_label, color=total_color)
+    for (label, fmt), leg_payoff in zip(leg_lines, leg_payoffs(strategy)):
+        ax.plot(*leg_payoff.vertices(spot_min, spot_max), fmt, label=label)
+    ax.axhline(0, color='black', linewidth=0.5)
+    for strike, color, label in strike_lines:
+        ax.axvline(strike, color=color, linestyle='--', linewidth=0.5, label=label)
+    breakevens = payoff.breakevens()
+    breakevens = breakevens[(breakevens >= spot_min) & (breakevens <= spot_max)]
+    if breakevens.size:
+        ax.plot(breakevens, np.zeros(breakevens.size), 'ko', markersize=4, label='Breakeven')
+    ax.set_xlabel('Spot Price')
+    ax.set_ylabel('Profit')
+    ax.set_title(title)
+    ax.legend()
+    return fig
+
+# One-line summary of the expiry payoff for display under the chart
+def payoff_summary(strategy):
+    payoff = expiry_payoff(strategy)
+    breakevens = ", ".join(f"{point:.2f}" for point in payoff.breakevens()) or "none"
+    max_profit = "unlimited" if np.isinf(payoff.max_profit()) else f"{payoff.max_profit():.2f}"
+    max_loss = "unlimited" if np.isinf(payoff.max_loss()) else f"{payoff.max_loss():.2f}"
+    return f"Breakevens at expiry: {breakevens} | Max profit: {max_profit} | Max loss: {max_loss}"
@@ -0,0 +1,149 @@
+# strike_scanner.py
+# Strike-ladder optimizer. Every strike combination of a template (vertical spreads,
+# butterflies of every width, strangles) is laid out as a row of a (candidates, legs)
+# array, priced with Black-Scholes at the current spot and vol, and scored in one
+# vectorized pass on its exact piecewise-linear expiry payoff:
+#   max_profit / max_loss   - extremes over the kinks (unlimited when the last slope is non-zero)
+#   reward_risk             - max_profit / |max_loss|
+#   pop                     - probability of profit at expiry under the model's lognormal
+#                             terminal distribution, integrated exactly between breakevens
+# The result also flags the Pareto frontier of reward/risk against pop (or of the bounded
+# side against pop when profit or loss is unlimited).
+import timeit
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from black_scholes import call_price, put_price
+from fast_norm import norm_cdf
+
+# kinds and signed quantities per leg, plus how strike indices into the ladder are chosen
+TEMPLATES = {
+    "bull_call_spread": (("call", "call"), (1.0, -1.0), "pairs"),
+    "bull_put_spread": (("put", "put"), (1.0, -1.0), "pairs"),
+    "bear_call_spread": (("call", "call"), (-1.0, 1.0), "pairs"),
+    "bear_put_spread": (("put", "put"), (-1.0, 1.0), "pairs"),
+    "long_call_butterfly": (("call", "call", "call"), (1.0, -2.0, 1.0), "butterflies"),
+    "long_put_butterfly": (("put", "put", "put"), (1.0, -2.0, 1.0), "butterflies"),
+    "long_strangle": (("put", "call"), (1.0, 1.0), "pairs"),
+    "short_strangle": (("put", "call"), (-1.0, -1.0), "pairs"),
+}
+
+OBJECTIVES = ("max_loss", "reward_risk", "pop")
+
+ScanResult = namedtuple("ScanResult", ["template", "strikes", "net_premium", "max_profit", "max_loss", "reward_risk", "pop", "frontier"])
+
+def strike_ladder(S, width=0.25, step=None, num_strikes=101):
+    if step is not None:
+        return np.arange(S * (1 - width), S * (1 + width) + step / 2, step)
+    return np.linspace(S * (1 - width), S * (1 + width), num_strikes)
+
+# All index pairs i < j
+def pair_indices(num_strikes):
+    return np.column_stack(np.triu_indices(num_strikes, 1))
+
+# Every symmetric (i, i + w, i + 2w) with w >= 1
+def butterfly_indices(num_strikes):
+    lower, width = np.meshgrid(np.arange(num_strikes), np.arange(1, num_strikes), indexing="ij")
+    lower, width = lower.ravel(), width.ravel()
+    keep = lower + 2 * width < num_strikes
+    lower, width = lower[keep], width[keep]
+    return np.column_stack((lower, lower + width, lower + 2 * width))
+
+# P(S_T <= x) under the lognormal terminal distribution of the model (x may be 0 or inf)
+def terminal_cdf(x, S, T, r, sigma):
+    with np.errstate(divide="ignore"):
+        z = (np.log(x / S) - (r - 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+    return norm_cdf(z)
+
+def scan(template, S, T, r, sigma, ladder=None):
+    if template not in TEMPLATES:
+        raise ValueError(f"Unknown template: {template}")
+    kinds, weights, layout = TEMPLATES[template]
+    ladder = strike_ladder(S) if ladder is None else np.sort(np.asarray(ladder, dtype=float))
+    index = pair_indices(ladder.size) if layout == "pairs" else butterfly_indices(ladder.size)
+
+    is_call = np.array([kind == "call" for kind in kinds])
+    weights = np.array(weights)
+    strikes = ladder[index]  # (candidates, legs), ascending along legs
+    ladder_prices = np.where(is_call[:, np.newaxis], call_price(S, ladder, T, r, sigma), put_price(S, ladder, T, r, sigma))
+    premiums = ladder_prices[np.arange(len(kinds)), index]
+    net_premium = premiums @ weights
+
+    # Profit at every kink (0 and the strikes): (candidates, nodes)
+    nodes = np.concatenate((np.zeros((strikes.shape[0], 1)), strikes), axis=1)
+    intrinsic = np.where(is_call, np.maximum(nodes[:, :, np.newaxis] - strikes[:, np.newaxis, :], 0),
+                         np.maximum(strikes[:, np.newaxis, :] - nodes[:, :, np.newaxis], 0))
+    values = intrinsic @ weights - net_premium[:, np.newaxis]
+    final_slope = np.sum(weights[is_call])
+
+    max_profit = np.max(values, axis=1) if final_slope <= 0 else np.full(values.shape[0], np.inf)
+    max_loss = np.min(values, axis=1) if final_slope >= 0 else np.full(values.shape[0], -np.inf)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reward_risk = np.where(max_loss < 0, max_profit / -max_loss, np.inf)
+
+    # Probability of profit: on each linear piece the profitable part is an interval bounded by
+    # the piece's end points and its breakeven, so its probability is a difference of terminal CDFs
+    lo, hi = nodes, np.concatenate((nodes[:, 1:], np.full((nodes.shape[0], 1), np.inf)), axis=1)
+    v_lo = values
+    v_hi = np.concatenate((values[:, 1:], values[:, -1:] + final_slope), axis=1)  # one unit past the last kink
+    ray_end = np.where(np.isinf(hi), lo + 1, hi)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        root = lo + v_lo * (ray_end - lo) / (v_lo - v_hi)
+    # Past the last kink "profitable at the far end" means profitable as spot goes to infinity
+    profit_lo = v_lo > 0
+    profit_hi = np.where(np.isinf(hi), (final_slope > 0) | ((final_slope == 0) & profit_lo), v_hi > 0)
+    start = np.where(profit_lo, lo, np.where(profit_hi, root, hi))
+    end = np.where(profit_hi, hi, np.where(profit_lo, root, hi))
+    pop = np.sum(terminal_cdf(end, S, T, r, sigma) - terminal_cdf(start, S, T, r, sigma), axis=1)
+
+    # With one side unbounded reward/risk is the same (inf or 0) for every candidate, so the
+    # frontier then trades the bounded side against probability of profit instead
+    if final_slope > 0:
+        frontier = pareto_frontier(max_loss, pop)
+    elif final_slope < 0:
+        frontier = pareto_frontier(max_profit, pop)
+    else:
+        frontier = pareto_frontier(reward_risk, pop)
+    return ScanResult(template, strikes, net_premium, max_profit, max_loss, reward_risk, pop, frontier)
+
+# Non-dominated points when both objectives are maximized: sort by the first, keep each
+# point whose second objective beats everything ranked above it
+def pareto_frontier(first, second):
+    order = np.lexsort((-second, -first))
+    best_before = np.maximum.accumulate(np.concatenate(([-np.inf], second[order][:-1])))
+    frontier = np.zeros(first.size, dtype=bool)
+    frontier[order] = second[order] > best_before
+    return frontier
+
+# Indices of the top candidates by objective (higher is better for all three)
+def ranked(result, objective="reward_risk", top=10, frontier_only=False):
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    score = getattr(result, objective)
+    candidates = np.flatnonzero(result.frontier) if frontier_only else np.arange(score.size)
+    order = candidates[np.lexsort((-result.pop[candidates], -score[candidates]))]
+    return order[:top]
+
+# Display table of the top candidates, one row per strike set
+def scan_table(result, objective="reward_risk", top=10, frontier_only=True):
+    rows = ranked(result, objective, top, frontier_only)
+    table = pd.DataFrame(result.strikes[rows], columns=[f"K{leg + 1}" for leg in range(result.strikes.shape[1])])
+    table["Net Premium"] = result.net_premium[rows]
+    table["Max Profit"] = result.max_profit[rows]
+    table["Max Loss"] = result.max_loss[rows]
+    table["Reward/Risk"] = result.reward_risk[rows]
+    table["PoP"] = result.pop[rows]
+    return table.round(4)
+
+# Time a full-ladder sweep of every template; returns {template: (candidates, seconds)}
+def benchmark(S=100.0, T=0.5, r=0.03, sigma=0.25, num_strikes=201, repeat=3):
+    ladder = strike_ladder(S, num_strikes=num_strikes)
+    results = {}
+    for template in TEMPLATES:
+        seconds = min(timeit.repeat(lambda: scan(template, S, T, r, sigma, ladder), number=1, repeat=repeat))
+        results[template] = (scan(template, S, T, r, sigma, ladder).strikes.shape[0], seconds)
+    return results
+
+if __name__ == "__main__":
+    for template, (candidates, seconds) in benchmark().items():
+        print(f"{template:>20}: {candidates:>6,} candidates in {seconds * 1e3:7.1f} ms")